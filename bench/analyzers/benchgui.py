@@ -0,0 +1,58 @@
+"""The manhuagui-style analyzer for the local mock site (bench only).
+
+[Entry examples]
+
+    - http://127.0.0.1:8080/gui/comic/1/
+"""
+
+import re
+import json
+
+from cmdlr.analyzer import BaseAnalyzer
+from cmdlr.autil import fetch
+
+
+class Analyzer(BaseAnalyzer):
+    """The manhuagui-style mock site analyzer."""
+
+    entry_patterns = [
+        re.compile(r'^http://(?:127\.0\.0\.1|localhost):\d+/gui/comic/\d+/$'),
+    ]
+
+    async def get_comic_info(self, url, request, **unused):
+        """Get comic info."""
+        soup, absurl = await fetch(url, request)
+
+        volumes = {}
+
+        for sect_title_tag in soup.find_all('h4'):
+            chapter_list_tag = (sect_title_tag
+                                .find_next_sibling(class_='chapter-list'))
+
+            for a in chapter_list_tag.find_all('a'):
+                name = '{}_{}'.format(sect_title_tag.get_text(), a['title'])
+                volumes[name] = absurl(a['href'])
+
+        return {
+            'name': soup.find('div', class_='book-title').h1.string,
+            'volumes': volumes,
+            'description': soup.find('div', id='intro-all').get_text(),
+            'finished': False,
+        }
+
+    async def save_volume_images(self, url, request, save_image, **unused):
+        """Get all images in one volume."""
+        soup, absurl = await fetch(url, request)
+
+        script = soup.find('script', string=re.compile(r'SMH\.imgData')).string
+        chapter_info = json.loads(re.search(r'{.*}', script).group(0))
+
+        for page_num, filename in enumerate(chapter_info['files'], start=1):
+            image_url = absurl('{path}{filename}?cid={cid}&md5={md5}'.format(
+                path=chapter_info['path'],
+                filename=re.sub(r'\.webp$', '', filename),
+                cid=chapter_info['cid'],
+                md5=chapter_info['sl']['md5'],
+            ))
+
+            save_image(page_num, url=image_url)
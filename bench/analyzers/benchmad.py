@@ -0,0 +1,54 @@
+"""The cartoonmad-style analyzer for the local mock site (bench only).
+
+[Entry examples]
+
+    - http://127.0.0.1:8080/mad/comic/1.html
+"""
+
+import re
+
+from cmdlr.analyzer import BaseAnalyzer
+from cmdlr.autil import fetch
+
+
+class Analyzer(BaseAnalyzer):
+    """The cartoonmad-style mock site analyzer."""
+
+    entry_patterns = [
+        re.compile(
+            r'^http://(?:127\.0\.0\.1|localhost):\d+/mad/comic/\d+\.html$'
+        ),
+    ]
+
+    async def get_comic_info(self, url, request, **unused):
+        """Get comic info."""
+        soup, absurl = await fetch(url, request)
+
+        a_tags = (soup
+                  .find('legend', string=re.compile('漫畫線上觀看'))
+                  .parent
+                  .find_all(href=re.compile(r'/mad/comic/')))
+
+        return {
+            'name': soup.title.string.split(' - ')[0],
+            'volumes': {a.string: absurl(a.get('href')) for a in a_tags},
+            'description': soup.find('fieldset', id='info').td.get_text(),
+            'authors': [soup.find(string=re.compile('作者：'))
+                        .split('：')[1].strip()],
+            'finished': False,
+        }
+
+    async def save_volume_images(self, url, request, save_image, **unused):
+        """Get all images in one volume."""
+        soup, absurl = await fetch(url, request)
+
+        first_src = absurl(soup.find('img')['src'])
+        url_tpl = re.sub(r'\d{3}\.jpg$', '{:03}.jpg', first_src)
+        page_count = len(soup.find_all('option', value=True))
+
+        for page_num in range(1, page_count + 1):
+            save_image(
+                page_num,
+                url=url_tpl.format(page_num),
+                headers={'Referer': url},
+            )
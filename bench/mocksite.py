@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""A local mock comic site for benchmarking.
+
+It emulate two kinds of comic sites:
+
+    mad: cartoonmad-style, the volume page contain a page selector and an
+         image url template.
+
+         /mad/comic/{cid}.html                 entry page
+         /mad/comic/{cid}/{vid}.html           volume page
+         /img/mad/{cid}/{vid}/{page}.jpg       image
+
+    gui: manhuagui-style, the volume page contain a chapter info object in
+         a script tag (not packed, so node.js is not required).
+
+         /gui/comic/{cid}/                     entry page
+         /gui/comic/{cid}/{vid}.html           volume page
+         /img/gui/{cid}/{vid}/{page}.png       image
+
+The server can inject latency, server errors (500) and throttling (429) in
+all responses, and truncated bodies in images. Statistics can be retrieved
+from `/_stats`.
+
+Usage:
+
+    $ python3 bench/mocksite.py --port 8080 --latency 0.05 --error-rate 0.01
+
+The first line of stdout is `listening on {port}` when the server ready.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+
+from aiohttp import web
+
+
+_MAD_ENTRY = '''<html><head><title>{name} - mock</title></head><body>
+<fieldset id="info"><table><tr><td>{name} description</td></tr></table>
+</fieldset>
+<span>作者：mock author</span>
+<fieldset><legend>漫畫線上觀看</legend>
+{links}
+</fieldset>
+</body></html>'''
+
+_MAD_VOLUME = '''<html><head><title>{name}</title></head><body>
+<select>{options}</select>
+<img src="/img/mad/{cid}/{vid}/001.jpg">
+</body></html>'''
+
+_GUI_ENTRY = '''<html><head><title>{name}</title></head><body>
+<div class="book-title"><h1>{name}</h1></div>
+<div id="intro-all">{name} description</div>
+<div class="chapter cf">
+<h4>單話</h4>
+<div class="chapter-list">{links}</div>
+</div>
+</body></html>'''
+
+_GUI_VOLUME = '''<html><head><title>{name}</title></head><body>
+<script>SMH.imgData({chapter_info}).preInit();</script>
+</body></html>'''
+
+
+def _get_jpeg(size):
+    """Get a jpeg-like binary which has correct signature and EOI marker."""
+    body_size = max(size - 6, 0)
+
+    return b'\xff\xd8\xff\xe0' + b'\x00' * body_size + b'\xff\xd9'
+
+
+def _get_png(size):
+    """Get a png-like binary which has correct signature and IEND chunk."""
+    signature = b'\x89PNG\r\n\x1a\n'
+    iend = b'\x00\x00\x00\x00IEND\xaeB`\x82'
+    body_size = max(size - len(signature) - len(iend), 0)
+
+    return signature + b'\x00' * body_size + iend
+
+
+class MockSite:
+    """The mock site state and handlers."""
+
+    def __init__(self, options):
+        """Init."""
+        self.options = options
+        self.random = random.Random(options.seed)
+
+        self.jpeg = _get_jpeg(options.image_size)
+        self.png = _get_png(options.image_size)
+
+        self.stats = defaultdict(lambda: {
+            'count': 0,
+            'bytes': 0,
+            'errors': 0,
+            'throttled': 0,
+            'truncated': 0,
+            'seconds': 0.0,
+        })
+
+    def __get_name(self, site, cid):
+        return '{}-book-{:04}'.format(site, int(cid))
+
+    def __get_vids(self):
+        return ['{:03}'.format(vid)
+                for vid in range(1, self.options.volumes + 1)]
+
+    async def __respond(self, stage, get_response):
+        start = time.perf_counter()
+        stat = self.stats[stage]
+        stat['count'] += 1
+
+        latency = self.options.latency
+
+        if latency:
+            await asyncio.sleep(self.random.uniform(latency * 0.5,
+                                                    latency * 1.5))
+
+        dice = self.random.random()
+
+        if dice < self.options.throttle_rate:
+            stat['throttled'] += 1
+            response = web.Response(status=429, text='Too Many Requests')
+
+        elif dice < self.options.throttle_rate + self.options.error_rate:
+            stat['errors'] += 1
+            response = web.Response(status=500, text='Server Error')
+
+        else:
+            response = get_response()
+            stat['bytes'] += len(response.body)
+
+        stat['seconds'] += time.perf_counter() - start
+
+        return response
+
+    async def mad_entry(self, request):
+        """Cartoonmad-style entry page."""
+        cid = request.match_info['cid']
+
+        def get_response():
+            links = '\n'.join(
+                '<a href="/mad/comic/{cid}/{vid}.html">vol_{vid}</a>'
+                .format(cid=cid, vid=vid)
+                for vid in self.__get_vids()
+            )
+
+            return web.Response(
+                text=_MAD_ENTRY.format(name=self.__get_name('mad', cid),
+                                       links=links),
+                content_type='text/html',
+            )
+
+        return await self.__respond('entry', get_response)
+
+    async def mad_volume(self, request):
+        """Cartoonmad-style volume page."""
+        cid = request.match_info['cid']
+        vid = request.match_info['vid']
+
+        def get_response():
+            options = ''.join('<option value="{0}">{0}</option>'.format(page)
+                              for page in range(1, self.options.pages + 1))
+
+            return web.Response(
+                text=_MAD_VOLUME.format(name=self.__get_name('mad', cid),
+                                        options=options, cid=cid, vid=vid),
+                content_type='text/html',
+            )
+
+        return await self.__respond('volume', get_response)
+
+    async def gui_entry(self, request):
+        """Manhuagui-style entry page."""
+        cid = request.match_info['cid']
+
+        def get_response():
+            links = '\n'.join(
+                '<a href="/gui/comic/{cid}/{vid}.html" title="vol_{vid}">'
+                'vol_{vid}</a>'.format(cid=cid, vid=vid)
+                for vid in self.__get_vids()
+            )
+
+            return web.Response(
+                text=_GUI_ENTRY.format(name=self.__get_name('gui', cid),
+                                       links=links),
+                content_type='text/html',
+            )
+
+        return await self.__respond('entry', get_response)
+
+    async def gui_volume(self, request):
+        """Manhuagui-style volume page."""
+        cid = request.match_info['cid']
+        vid = request.match_info['vid']
+
+        def get_response():
+            chapter_info = {
+                'cid': int(vid),
+                'path': '/img/gui/{}/{}/'.format(cid, vid),
+                'files': ['{:03}.png.webp'.format(page)
+                          for page in range(1, self.options.pages + 1)],
+                'sl': {'md5': 'mockmd5'},
+            }
+
+            return web.Response(
+                text=_GUI_VOLUME.format(name=self.__get_name('gui', cid),
+                                        chapter_info=json.dumps(chapter_info)),
+                content_type='text/html',
+            )
+
+        return await self.__respond('volume', get_response)
+
+    async def image(self, request):
+        """Image endpoint."""
+        site = request.match_info['site']
+
+        def get_response():
+            if site == 'mad':
+                body, content_type = self.jpeg, 'image/jpeg'
+
+            else:
+                body, content_type = self.png, 'image/png'
+
+            if self.options.octet_stream:
+                content_type = 'application/octet-stream'
+
+            if self.random.random() < self.options.truncate_rate:
+                self.stats['image']['truncated'] += 1
+                body = body[:len(body) // 2]
+
+            return web.Response(body=body, content_type=content_type)
+
+        return await self.__respond('image', get_response)
+
+    async def stats_handler(self, request):
+        """Return the statistics."""
+        return web.json_response(self.stats)
+
+    async def reset_handler(self, request):
+        """Reset the statistics."""
+        self.stats.clear()
+
+        return web.json_response({})
+
+    def get_app(self):
+        """Build the aiohttp application."""
+        app = web.Application()
+        app.router.add_get('/mad/comic/{cid:\\d+}.html', self.mad_entry)
+        app.router.add_get('/mad/comic/{cid:\\d+}/{vid:\\d+}.html',
+                           self.mad_volume)
+        app.router.add_get('/gui/comic/{cid:\\d+}/', self.gui_entry)
+        app.router.add_get('/gui/comic/{cid:\\d+}/{vid:\\d+}.html',
+                           self.gui_volume)
+        app.router.add_get('/img/{site}/{cid}/{vid}/{filename}', self.image)
+        app.router.add_get('/_stats', self.stats_handler)
+        app.router.add_post('/_reset', self.reset_handler)
+
+        return app
+
+
+def get_parser():
+    """Get the argument parser of mock site options."""
+    parser = argparse.ArgumentParser(description='Run a mock comic site.')
+
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0,
+                        help='0 for a random free port (default: 0)')
+    add_site_arguments(parser)
+
+    return parser
+
+
+def add_site_arguments(parser):
+    """Add mock site behavior arguments into parser."""
+    parser.add_argument('--volumes', type=int, default=5,
+                        help='volumes per book (default: 5)')
+    parser.add_argument('--pages', type=int, default=20,
+                        help='pages per volume (default: 20)')
+    parser.add_argument('--image-size', type=int, default=200 * 1024,
+                        help='image size in bytes (default: 204800)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='mean response latency in seconds (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='ratio of 500 responses (default: 0)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='ratio of 429 responses (default: 0)')
+    parser.add_argument('--truncate-rate', type=float, default=0.0,
+                        help='ratio of truncated images (default: 0)')
+    parser.add_argument('--octet-stream', action='store_true',
+                        help='serve images as application/octet-stream')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed (default: 0)')
+
+
+def main():
+    """Run the mock site until killed."""
+    options = get_parser().parse_args()
+    loop = asyncio.get_event_loop()
+
+    runner = web.AppRunner(MockSite(options).get_app())
+    loop.run_until_complete(runner.setup())
+
+    site = web.TCPSite(runner, options.host, options.port)
+    loop.run_until_complete(site.start())
+
+    port = site._server.sockets[0].getsockname()[1]
+    print('listening on {}'.format(port))
+    sys.stdout.flush()
+
+    try:
+        loop.run_forever()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        loop.run_until_complete(runner.cleanup())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Measure and check the startup cost of the `cmdlr` entry point.
+
+Each command path run in a fresh python process (cold start) in an isolated
+sandbox, which include a temporary config file and a few fake comics. For
+each path, this script report:
+
+    - the median wall time of the whole process.
+    - the total import time (from `python -X importtime`).
+    - the modules which should not be imported in this path.
+
+Usage:
+
+    $ python3 bench/startup.py              # print report
+    $ python3 bench/startup.py --check      # exit 1 if budget exceeded
+    $ python3 bench/startup.py --json       # machine readable output
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from statistics import median
+from tempfile import TemporaryDirectory
+
+
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_CMDLR_PY = os.path.join(_ROOT_DIR, 'cmdlr.py')
+
+_NETWORK_MODULES = ['aiohttp', 'aiohttp_socks']
+_PARSING_MODULES = ['bs4', 'fake_useragent']
+
+# name: (argv, forbidden modules, wall time budget (ms), import budget (ms))
+_CASES = [
+    ('version', ['--version'],
+     _NETWORK_MODULES + _PARSING_MODULES + ['cmdlr.amgr', 'wcwidth'],
+     250, 100),
+    ('analyzer-list', ['-a'],
+     _NETWORK_MODULES + _PARSING_MODULES + [
+         'wcwidth',
+         'cmdlr.analyzers.cartoonmad',
+         'cmdlr.analyzers.manhuagui',
+         'cmdlr.comic',
+         'voluptuous',
+         'asyncio',
+     ],
+     400, 200),
+    ('list', ['-l'],
+     _NETWORK_MODULES + _PARSING_MODULES,
+     600, 300),
+    ('json', ['-j'],
+     _NETWORK_MODULES + _PARSING_MODULES,
+     600, 300),
+]
+
+_CONFIG_YAML = """
+data_dirs:
+- '{data_dir}'
+logging_dir: null
+"""
+
+_FAKE_COMICS = [
+    ('cartoonmad-book', 'https://www.cartoonmad.com/comic/5640.html'),
+    ('manhuagui-book', 'https://tw.manhuagui.com/comic/23292/'),
+]
+
+
+def _build_sandbox(dirpath):
+    """Build config & data dir, return the extra cmdlr argv and env."""
+    data_dir = os.path.join(dirpath, 'comics')
+    config_filepath = os.path.join(dirpath, 'config.yaml')
+
+    with open(config_filepath, 'w', encoding='utf8') as f:
+        f.write(_CONFIG_YAML.format(data_dir=data_dir))
+
+    timestamp = {'__type__': 'timestamp', '__value__': '2018-01-01T00:00:00'}
+
+    for name, url in _FAKE_COMICS:
+        comic_dir = os.path.join(data_dir, name)
+        os.makedirs(comic_dir)
+
+        with open(os.path.join(comic_dir, '.comic-meta.json'), 'w',
+                  encoding='utf8') as f:
+            json.dump({
+                'url': url,
+                'name': name,
+                'volumes': {'vol_{:03}'.format(idx): '{}#{}'.format(url, idx)
+                            for idx in range(1, 21)},
+                'volumes_checked_time': timestamp,
+                'volumes_modified_time': timestamp,
+            }, f)
+
+    env = dict(os.environ)
+    env['XDG_CONFIG_HOME'] = os.path.join(dirpath, 'xdg-config')
+    env['XDG_CACHE_HOME'] = os.path.join(dirpath, 'xdg-cache')
+
+    return ['-C', '-c', config_filepath], env
+
+
+def _run(argv, env, extra_flags=()):
+    return subprocess.run(
+        [sys.executable, *extra_flags, _CMDLR_PY, *argv],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+
+
+def _parse_importtime(stderr):
+    """Return (total import microseconds, imported module names)."""
+    total_us = 0
+    modules = set()
+
+    for line in stderr.decode('utf8', errors='replace').splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        parts = [part.strip() for part in line[12:].split('|')]
+
+        if len(parts) != 3 or not parts[0].isdigit():
+            continue  # header line
+
+        total_us += int(parts[0])
+        modules.add(parts[2])
+
+    return total_us, modules
+
+
+def _measure_case(case, sandbox_argv, env, repeat):
+    name, argv, forbidden, wall_budget_ms, import_budget_ms = case
+    full_argv = sandbox_argv + argv
+
+    _run(full_argv, env)  # warm up the bytecode cache
+
+    wall_times = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run(full_argv, env)
+        wall_times.append((time.perf_counter() - start) * 1000)
+
+    proc = _run(full_argv, env, extra_flags=['-X', 'importtime'])
+    import_us, modules = _parse_importtime(proc.stderr)
+
+    return {
+        'name': name,
+        'argv': argv,
+        'wall_ms': round(median(wall_times), 2),
+        'wall_budget_ms': wall_budget_ms,
+        'import_ms': round(import_us / 1000, 2),
+        'import_budget_ms': import_budget_ms,
+        'forbidden_imported': sorted(
+            module for module in forbidden if module in modules
+        ),
+    }
+
+
+def _get_violations(result, scale):
+    violations = []
+
+    if result['wall_ms'] > result['wall_budget_ms'] * scale:
+        violations.append('wall time {wall_ms}ms > {budget}ms'.format(
+            wall_ms=result['wall_ms'],
+            budget=result['wall_budget_ms'] * scale))
+
+    if result['import_ms'] > result['import_budget_ms'] * scale:
+        violations.append('import time {import_ms}ms > {budget}ms'.format(
+            import_ms=result['import_ms'],
+            budget=result['import_budget_ms'] * scale))
+
+    if result['forbidden_imported']:
+        violations.append('imported: {}'.format(
+            ', '.join(result['forbidden_imported'])))
+
+    return violations
+
+
+def _parser_setting():
+    parser = argparse.ArgumentParser(
+        description='Measure the cold startup cost of cmdlr.')
+
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='how many cold starts per command (default: 5)')
+
+    parser.add_argument(
+        '--scale', type=float, default=1.0,
+        help='multiply all time budgets, for slow machines (default: 1.0)')
+
+    parser.add_argument(
+        '--check', action='store_true',
+        help='exit with status 1 if any budget was exceeded')
+
+    parser.add_argument(
+        '--json', action='store_true',
+        help='print the results as json')
+
+    return parser
+
+
+def main():
+    """Run all startup cases."""
+    args = _parser_setting().parse_args()
+    results = []
+
+    with TemporaryDirectory(prefix='cmdlr_bench_') as dirpath:
+        sandbox_argv, env = _build_sandbox(dirpath)
+
+        for case in _CASES:
+            result = _measure_case(case, sandbox_argv, env, args.repeat)
+            result['violations'] = _get_violations(result, args.scale)
+            results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    else:
+        for result in results:
+            print('{name:<15} wall {wall_ms:>8.2f}ms'
+                  '  import {import_ms:>8.2f}ms  {status}'.format(
+                      status=('; '.join(result['violations'])
+                              if result['violations'] else 'ok'),
+                      **result))
+
+    if args.check and any(result['violations'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
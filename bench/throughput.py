@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Measure the cmdlr download throughput against a local mock site.
+
+This script start `mocksite.py` in a subprocess, then drive
+`LoopManager.start` with the analyzers in `bench/analyzers` in two phases:
+
+    subscribe: fetch metadata and create all books.
+    download: download all volumes of those books.
+
+After that, it report the elapsed time, pages/sec, bytes/sec, errors,
+event loop lag, per-stage timings (from `cmdlr.stats`) of each phase and the
+peak RSS of the cmdlr process.
+
+Usage:
+
+    $ python3 bench/throughput.py --books 10 --pages 30 --latency 0.05
+    $ python3 bench/throughput.py --kind gui --throttle-rate 0.02 --json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from tempfile import TemporaryDirectory
+from urllib.request import urlopen
+from urllib.request import Request
+
+import mocksite
+
+
+_BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+_SRC_DIR = os.path.join(os.path.dirname(_BENCH_DIR), 'src')
+
+_CONFIG_YAML = """
+data_dirs:
+- '{data_dir}'
+logging_level: {logging_level}
+logging_dir: null
+analyzer_dir: '{analyzer_dir}'
+book_concurrent: {book_concurrent}
+network:
+  delay: {delay}
+  timeout: {timeout}
+  max_try: {max_try}
+  total_connections: {total_connections}
+  per_host_connections: {per_host_connections}
+"""
+
+
+class _MockSiteProcess:
+    """Run the mock site in a subprocess."""
+
+    def __init__(self, site_argv):
+        self.site_argv = site_argv
+        self.proc = None
+        self.port = None
+
+    def __enter__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.join(_BENCH_DIR, 'mocksite.py'),
+             '--port', '0', *self.site_argv],
+            stdout=subprocess.PIPE,
+        )
+
+        first_line = self.proc.stdout.readline().decode()
+        self.port = int(first_line.split()[-1])
+
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.proc.terminate()
+        self.proc.wait()
+
+    def __call_api(self, path, method='GET'):
+        url = 'http://127.0.0.1:{}{}'.format(self.port, path)
+
+        with urlopen(Request(url, method=method)) as resp:
+            return json.loads(resp.read().decode())
+
+    def get_stats(self):
+        """Get the statistics of mock site."""
+        return self.__call_api('/_stats')
+
+    def reset_stats(self):
+        """Reset the statistics of mock site."""
+        self.__call_api('/_reset', method='POST')
+
+
+def _get_urls(port, kind, books):
+    templates = {
+        'mad': 'http://127.0.0.1:{port}/mad/comic/{cid}.html',
+        'gui': 'http://127.0.0.1:{port}/gui/comic/{cid}/',
+    }
+    kinds = ['mad', 'gui'] if kind == 'both' else [kind]
+
+    return [templates[kinds[cid % len(kinds)]].format(port=port, cid=cid)
+            for cid in range(1, books + 1)]
+
+
+def _get_config(dirpath, args):
+    from cmdlr.conf import Config
+
+    config_filepath = os.path.join(dirpath, 'config.yaml')
+
+    with open(config_filepath, 'w', encoding='utf8') as f:
+        f.write(_CONFIG_YAML.format(
+            data_dir=os.path.join(dirpath, 'comics'),
+            analyzer_dir=os.path.join(_BENCH_DIR, 'analyzers'),
+            logging_level=args.logging_level,
+            book_concurrent=args.book_concurrent,
+            delay=args.delay,
+            timeout=args.timeout,
+            max_try=args.max_try,
+            total_connections=args.total_connections,
+            per_host_connections=args.per_host_connections,
+        ))
+
+    config = Config()
+    config.load_or_build(config_filepath)
+
+    return config
+
+
+def _summarize_phase(name, elapsed, site_stats, run_stats):
+    image = site_stats.get('image', {})
+    all_stats = site_stats.values()
+
+    ok_pages = image.get('count', 0) - image.get('errors', 0) - image.get(
+        'throttled', 0)
+    total_bytes = sum(stat['bytes'] for stat in all_stats)
+
+    return {
+        'phase': name,
+        'elapsed_sec': round(elapsed, 3),
+        'pages': ok_pages,
+        'pages_per_sec': round(ok_pages / elapsed, 2) if elapsed else 0,
+        'bytes': total_bytes,
+        'bytes_per_sec': round(total_bytes / elapsed, 2) if elapsed else 0,
+        'requests': {stage: stat['count']
+                     for stage, stat in site_stats.items()},
+        'errors': sum(stat['errors'] for stat in all_stats),
+        'throttled': sum(stat['throttled'] for stat in all_stats),
+        'loop_lag': {
+            'mean_ms': round(run_stats['loop_lag']['mean'] * 1000, 2),
+            'max_ms': round(run_stats['loop_lag']['max'] * 1000, 2),
+        },
+        'stages': run_stats['stages'],
+    }
+
+
+def _run_phase(name, site, lmgr, urls, ctrl):
+    from cmdlr.stats import stats
+
+    site.reset_stats()
+
+    start = time.perf_counter()
+    lmgr.start(urls, ctrl)
+    elapsed = time.perf_counter() - start
+
+    return _summarize_phase(name, elapsed, site.get_stats(), stats.get_data())
+
+
+def _run(args, site, dirpath):
+    from cmdlr.log import init_logging
+    from cmdlr.amgr import AnalyzerManager
+    from cmdlr.cmgr import ComicManager
+    from cmdlr.loopctrl import LoopManager
+
+    config = _get_config(dirpath, args)
+    init_logging(config.logging_dir, config.logging_level)
+
+    amgr = AnalyzerManager(config)
+    cmgr = ComicManager(config, amgr)
+    urls = _get_urls(site.port, args.kind, args.books)
+
+    phases = [
+        _run_phase('subscribe', site, LoopManager(config, amgr, cmgr), urls,
+                   {'update_meta': False, 'download': False}),
+        _run_phase('download', site, LoopManager(config, amgr, cmgr), [],
+                   {'update_meta': False, 'download': True,
+                    'skip_errors': args.skip_errors}),
+    ]
+
+    archives = sum(
+        len([filename for filename in filenames
+             if filename.endswith('.cbz')])
+        for _, _, filenames in os.walk(config.incoming_data_dir)
+    )
+
+    return {
+        'phases': phases,
+        'archives': archives,
+        'peak_rss_mb': round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+    }
+
+
+def _print_report(report):
+    for phase in report['phases']:
+        print('[{phase}]'.format(**phase))
+        print('    elapsed:    {elapsed_sec} sec'.format(**phase))
+        print('    pages:      {pages} ({pages_per_sec}/sec)'.format(**phase))
+        print('    bytes:      {bytes} ({bytes_per_sec}/sec)'.format(**phase))
+        print('    requests:   {}'.format(
+            ', '.join('{}={}'.format(stage, count)
+                      for stage, count in sorted(phase['requests'].items()))))
+        print('    errors:     {errors} (429: {throttled})'.format(**phase))
+        print('    loop lag:   mean {mean_ms}ms, max {max_ms}ms'
+              .format(**phase['loop_lag']))
+        print('    stages:')
+
+        for stage, record in sorted(phase['stages'].items()):
+            print('        {stage:<16} {count:>6}x  avg {mean:.4f}s'
+                  '  max {max:.4f}s'.format(stage=stage, **record))
+
+    print('archives: {archives}'.format(**report))
+    print('peak rss: {peak_rss_mb} MB'.format(**report))
+
+
+def _parser_setting():
+    parser = argparse.ArgumentParser(
+        description='Measure cmdlr throughput against a local mock site.')
+
+    parser.add_argument('--kind', choices=['mad', 'gui', 'both'],
+                        default='both',
+                        help='which kind of mock site (default: both)')
+    parser.add_argument('--books', type=int, default=6,
+                        help='how many books (default: 6)')
+    parser.add_argument('--book-concurrent', type=int, default=6)
+    parser.add_argument('--total-connections', type=int, default=12)
+    parser.add_argument('--per-host-connections', type=int, default=12)
+    parser.add_argument('--delay', type=float, default=0)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--max-try', type=int, default=5)
+    parser.add_argument('--skip-errors', action='store_true')
+    parser.add_argument('--logging-level', default='WARNING')
+    parser.add_argument('--json', action='store_true',
+                        help='print the report as json')
+    mocksite.add_site_arguments(parser)
+
+    return parser
+
+
+def _get_site_argv(args):
+    return [
+        '--volumes', str(args.volumes),
+        '--pages', str(args.pages),
+        '--image-size', str(args.image_size),
+        '--latency', str(args.latency),
+        '--error-rate', str(args.error_rate),
+        '--throttle-rate', str(args.throttle_rate),
+        '--truncate-rate', str(args.truncate_rate),
+        '--seed', str(args.seed),
+    ] + (['--octet-stream'] if args.octet_stream else [])
+
+
+def main():
+    """Run the benchmark."""
+    args = _parser_setting().parse_args()
+
+    with TemporaryDirectory(prefix='cmdlr_bench_') as dirpath:
+        # isolate the benchmark from user's cache
+        os.environ['XDG_CACHE_HOME'] = os.path.join(dirpath, 'xdg-cache')
+        sys.path.insert(0, _SRC_DIR)
+
+        with _MockSiteProcess(_get_site_argv(args)) as site:
+            report = _run(args, site, dirpath)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+    else:
+        _print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -49,6 +49,9 @@ setup(
         'beautifulsoup4',
         'fake_useragent == 0.1.11',
     ],
+    extras_require={
+        'transcode': ['Pillow'],
+    },
     setup_requires=[],
 
     package_dir={'': 'src'},
@@ -0,0 +1,170 @@
+"""Read analyzer manifest without executing the analyzer module.
+
+A manifest contain the informations which cmdlr needed before the analyzer
+really be used:
+
+    name: (str) the analyzer's name.
+    desc: (str) the analyzer module's docstring.
+    entry_patterns: (list of re.compile) the entry patterns.
+    default_pref: (dict) the analyzer's default preference.
+
+Those informations are statically extracted from the module source code, so
+the heavy dependencies of an analyzer (e.g., html parser) will not be loaded
+until the analyzer was really dispatched.
+
+If the source code cannot be read statically (e.g., the `entry_patterns` are
+built dynamically), the module will be imported as a fallback.
+"""
+
+import ast
+import re
+from collections import namedtuple
+
+
+AnalyzerManifest = namedtuple(
+    'AnalyzerManifest',
+    ['name', 'desc', 'entry_patterns', 'default_pref'],
+)
+
+
+class _NotStatic(Exception):
+    """The node cannot be evaluated statically."""
+
+
+def _eval_re_flags(node):
+    if (isinstance(node, ast.Attribute)
+            and isinstance(node.value, ast.Name)
+            and node.value.id == 're'):
+        return getattr(re, node.attr)
+
+    elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        return _eval_re_flags(node.left) | _eval_re_flags(node.right)
+
+    return _eval_literal(node)
+
+
+def _eval_literal(node):
+    try:
+        return ast.literal_eval(node)
+
+    except ValueError:
+        raise _NotStatic() from None
+
+
+def _eval_pattern(node):
+    """Evaluate a `str` or `re.compile(...)` node to re.compile type."""
+    if isinstance(node, ast.Call):
+        func = node.func
+
+        if (isinstance(func, ast.Attribute)
+                and func.attr == 'compile'
+                and isinstance(func.value, ast.Name)
+                and func.value.id == 're'
+                and not node.keywords
+                and 1 <= len(node.args) <= 2):
+            pattern = _eval_literal(node.args[0])
+            flags = (_eval_re_flags(node.args[1])
+                     if len(node.args) == 2 else 0)
+
+            return re.compile(pattern, flags)
+
+        raise _NotStatic()
+
+    pattern = _eval_literal(node)
+
+    if not isinstance(pattern, str):
+        raise _NotStatic()
+
+    return re.compile(pattern)
+
+
+def _is_base_analyzer(node):
+    return ((isinstance(node, ast.Name) and node.id == 'BaseAnalyzer')
+            or (isinstance(node, ast.Attribute)
+                and node.attr == 'BaseAnalyzer'))
+
+
+def _get_class_assigns(class_node):
+    assigns = {}
+
+    for node in class_node.body:
+        if (isinstance(node, ast.Assign)
+                and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name)):
+            assigns[node.targets[0].id] = node.value
+
+    return assigns
+
+
+def _get_analyzer_class_node(module_node):
+    for node in module_node.body:
+        if isinstance(node, ast.ClassDef) and node.name == 'Analyzer':
+            return node
+
+    raise _NotStatic()
+
+
+def _read_static_manifest(name, source):
+    module_node = ast.parse(source)
+    class_node = _get_analyzer_class_node(module_node)
+    assigns = _get_class_assigns(class_node)
+
+    if not all(_is_base_analyzer(base) for base in class_node.bases):
+        raise _NotStatic()  # may inherit attributes from unknown class
+
+    patterns_node = assigns.get('entry_patterns')
+
+    if not isinstance(patterns_node, (ast.List, ast.Tuple)):
+        raise _NotStatic()
+
+    entry_patterns = [_eval_pattern(node) for node in patterns_node.elts]
+
+    if 'default_pref' in assigns:
+        default_pref = _eval_literal(assigns['default_pref'])
+
+    else:
+        default_pref = {}
+
+    return AnalyzerManifest(
+        name=name,
+        desc=ast.get_docstring(module_node, clean=False),
+        entry_patterns=entry_patterns,
+        default_pref=default_pref,
+    )
+
+
+def _read_module_manifest(name, module):
+    analyzer_cls = module.Analyzer
+
+    return AnalyzerManifest(
+        name=name,
+        desc=module.__doc__,
+        entry_patterns=[
+            re.compile(pattern) if isinstance(pattern, str) else pattern
+            for pattern in analyzer_cls.entry_patterns
+        ],
+        default_pref=analyzer_cls.default_pref,
+    )
+
+
+def read_manifest(name, spec, load_module):
+    """Get the manifest of an analyzer.
+
+    Args:
+        name (str): the analyzer name.
+        spec (ModuleSpec): the module spec of this analyzer module.
+        load_module (callable): a function without args to import the
+            analyzer module, only be used when static reading failed.
+
+    Returns:
+        A AnalyzerManifest object.
+
+    """
+    try:
+        with open(spec.origin, 'rb') as f:
+            source = f.read()
+
+        return _read_static_manifest(name, source)
+
+    except (_NotStatic, SyntaxError, TypeError, OSError):
+        return _read_module_manifest(name, load_module())
@@ -8,6 +8,8 @@ import re
 from functools import lru_cache
 from collections import namedtuple
 from .analyzer import ANALYZERS_PKGPATH
+from .amanifest import read_manifest
+from .merge import merge_dict
 
 from .exception import NoMatchAnalyzer
 from .exception import ExtraAnalyzersDirNotExists
@@ -21,15 +23,22 @@ _AnalyzerInfo = namedtuple(
 
 
 class AnalyzerManager:
-    """Import, active, dispatch and hold all analyzer."""
+    """Import, active, dispatch and hold all analyzer.
+
+    The analyzer modules are not be imported at the beginning. Only the
+    analyzer manifests are loaded, and a module will be imported when the
+    analyzer was dispatched at first time.
+    """
 
     def __init__(self, config):
-        """Import all analyzers."""
+        """Load all analyzer manifests."""
         self.__analyzers = {}
+        self.__manifests = {}
+        self.__specs = {}
         self.__analyzer_picker = None
         self.config = config
 
-        self.__import_all_analyzer()
+        self.__read_all_manifest()
         self.__build_analyzer_picker()
 
     def __get_analyzer_dirs(self):
@@ -53,42 +62,59 @@ class AnalyzerManager:
 
         return analyzer_dirs
 
-    def __register_analyzer(self, module, analyzer_name):
+    @staticmethod
+    def __get_full_module_name(analyzer_name):
+        return ''.join([
+            ANALYZERS_PKGPATH,
+            '.',
+            analyzer_name,
+        ])
+
+    def __import_module(self, analyzer_name):
+        full_module_name = self.__get_full_module_name(analyzer_name)
+
+        if full_module_name in sys.modules:
+            return sys.modules[full_module_name]
+
+        spec = self.__specs[analyzer_name]
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[full_module_name] = module
+        spec.loader.exec_module(module)
+
+        return module
+
+    def __register_analyzer(self, analyzer_name):
+        module = self.__import_module(analyzer_name)
         analyzer = module.Analyzer(
             pref=self.config.get_analyzer_pref(analyzer_name),
         )
 
         self.__analyzers[analyzer_name] = analyzer
 
-    def __import_all_analyzer(self):
+        return analyzer
+
+    def __read_all_manifest(self):
         analyzer_dirs = self.__get_analyzer_dirs()
 
         for finder, module_name, ispkg in pkgutil.iter_modules(analyzer_dirs):
             if self.config.is_enabled_analyzer(module_name):
-                full_module_name = ''.join([
-                    ANALYZERS_PKGPATH,
-                    '.',
-                    module_name,
-                ])
+                full_module_name = self.__get_full_module_name(module_name)
+                self.__specs[module_name] = finder.find_spec(full_module_name)
 
-                spec = finder.find_spec(full_module_name)
-                module = importlib.util.module_from_spec(spec)
-                sys.modules[full_module_name] = module
-                spec.loader.exec_module(module)
-
-                self.__register_analyzer(module, module_name)
+                self.__manifests[module_name] = read_manifest(
+                    module_name,
+                    self.__specs[module_name],
+                    lambda: self.__import_module(module_name),
+                )
 
     def __build_analyzer_picker(self):
         retype = type(re.compile(''))
         mappers = []
 
-        for aname, analyzer in self.__analyzers.items():
-            for pattern in analyzer.entry_patterns:
+        for aname, manifest in self.__manifests.items():
+            for pattern in manifest.entry_patterns:
                 if isinstance(pattern, retype):
-                    mappers.append((pattern, analyzer))
-
-                elif isinstance(pattern, str):
-                    mappers.append((re.compile(pattern), analyzer))
+                    mappers.append((pattern, aname))
 
                 else:
                     raise AnalyzerRuntimeError(
@@ -98,9 +124,9 @@ class AnalyzerManager:
                     )
 
         def analyzer_picker(curl):
-            for pattern, analyzer in mappers:
+            for pattern, aname in mappers:
                 if pattern.search(curl):
-                    return analyzer
+                    return aname
 
             raise NoMatchAnalyzer(
                 'No Matched Analyzer: {}'.format(curl),
@@ -133,10 +159,34 @@ class AnalyzerManager:
         return result
 
     @lru_cache(maxsize=None, typed=True)
-    def get(self, curl):
-        """Get a url matched analyzer."""
+    def get_name(self, curl):
+        """Get a url matched analyzer's name without importing it."""
         return self.__analyzer_picker(curl)
 
-    def get_all(self):
-        """Return all analyzers."""
-        return list(self.__analyzers.values())
+    def get(self, curl):
+        """Get a url matched analyzer, import it if necessary."""
+        aname = self.get_name(curl)
+        analyzer = self.__analyzers.get(aname)
+
+        if analyzer is None:
+            analyzer = self.__register_analyzer(aname)
+
+        return analyzer
+
+    def get_info(self, aname):
+        """Get an analyzer's information by name without importing it."""
+        manifest = self.__manifests[aname]
+
+        return _AnalyzerInfo(
+            name=manifest.name,
+            desc=manifest.desc,
+            default_pref=manifest.default_pref,
+            current_pref=merge_dict(
+                manifest.default_pref,
+                self.config.get_analyzer_pref(aname),
+            ),
+        )
+
+    def get_all_info(self):
+        """Return all analyzers' information."""
+        return [self.get_info(aname) for aname in self.__manifests]
@@ -68,6 +68,13 @@ class BaseAnalyzer(_BaseAnalyzer):
         """Normalize all possible entry url to single one form."""
         return url
 
+    def on_volume_images_failed(self, url):
+        """Be called when some images of the volume `url` failed."""
+
+    def get_image_key(self, url):
+        """Get a key to identify the image of url across runs."""
+        return url
+
     def get_image_extension(self, resp):
         """Get image extension."""
         ctype = resp.content_type
@@ -80,6 +87,10 @@ class BaseAnalyzer(_BaseAnalyzer):
             return '.gif'
         elif ctype == 'image/bmp':
             return '.bmp'
+        elif ctype == 'image/webp':
+            return '.webp'
+        elif ctype == 'image/avif':
+            return '.avif'
 
     @staticmethod
     def to_config(pref):
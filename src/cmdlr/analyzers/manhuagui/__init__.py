@@ -20,7 +20,8 @@
 
     ## image_host_codes
 
-    Select which images servers should be used.
+    Select which images servers should be used. Each image be fetched from
+    the fastest healthy server, and the retries go to the other servers.
 
     Current available servers: ['eu', 'i', 'us']
 
@@ -32,13 +33,28 @@
     ## ignore_volume_patterns
 
     Ignore some volumes if the volume name contain some regex patterns.
+
+
+
+    ## chapter_info_cache
+
+    Cache the decoded image list of volumes, so the retries and the resumed
+    downloads skip the volume page fetching and the js decoding.
+
+    - dir: the cache directory, default: `<cache_dir>/manhuagui-chapters`
+    - ttl: seconds a decoded volume can be reused (0: disable the cache)
+
+    The cached one will be dropped if any images of the volume failed.
 """
 
+import os
 import re
 import logging
+from functools import lru_cache
 
 from cmdlr.exception import AnalyzerRuntimeError
 from cmdlr.analyzer import BaseAnalyzer
+from cmdlr.conf import Config
 
 from cmdlr.autil import fetch
 from cmdlr.autil import get_random_useragent
@@ -48,7 +64,10 @@ from .infoext import extract_name
 from .infoext import extract_finished
 from .infoext import extract_description
 from .infoext import extract_authors
+from .imgext import get_chapter_info
 from .imgext import get_image_urls
+from .imgext import get_image_key
+from .chapcache import ChapterInfoCache
 
 
 class Analyzer(BaseAnalyzer):
@@ -64,6 +83,10 @@ class Analyzer(BaseAnalyzer):
         'image_host_codes': ['eu', 'i', 'us'],
         'ignore_volume_patterns': ['�'],
         'meta_source': 'tw',
+        'chapter_info_cache': {
+            'dir': None,
+            'ttl': 3600,
+        },
     }
 
     @property
@@ -73,7 +96,7 @@ class Analyzer(BaseAnalyzer):
             'method': 'GET',
             'headers': {
                 'referer': 'http://www.manhuagui.com/comic/',
-                'user-agent': self.config['user_agent'],
+                'user-agent': self.config['get_user_agent'](),
             },
         }
 
@@ -116,13 +139,29 @@ class Analyzer(BaseAnalyzer):
 
             return volume_filter
 
+        def get_chapter_info_cache(chapter_info_cache):
+            if not chapter_info_cache['ttl']:
+                return None
+
+            dirpath = chapter_info_cache['dir'] or os.path.join(
+                Config.default_cache_dirpath, 'manhuagui-chapters')
+
+            return ChapterInfoCache(
+                os.path.expanduser(dirpath),
+                chapter_info_cache['ttl'],
+            )
+
         return {
             'image_host_codes': pref['image_host_codes'],
             'entry_subdomain': get_entry_subdomain(pref['meta_source']),
             'volume_filter': get_volume_filter(
                 pref['ignore_volume_patterns'],
             ),
-            'user_agent': get_random_useragent(),
+            'chapter_info_cache': get_chapter_info_cache(
+                pref['chapter_info_cache'],
+            ),
+            # pick once, but only when the first request be sent
+            'get_user_agent': lru_cache()(get_random_useragent),
         }
 
     def entry_normalizer(self, url):
@@ -138,6 +177,17 @@ class Analyzer(BaseAnalyzer):
 
         return 'https://{}.manhuagui.com/comic/{}/'.format(subdomain, comic_id)
 
+    def get_image_key(self, url):
+        """Get a key to identify the image of url across runs."""
+        return get_image_key(url)
+
+    def on_volume_images_failed(self, url):
+        """Drop the cached chapter_info, the token in it may be expired."""
+        chapter_info_cache = self.config['chapter_info_cache']
+
+        if chapter_info_cache:
+            chapter_info_cache.discard(url)
+
     async def get_comic_info(self, url, request, loop):
         """Find comic info from entry."""
         fetch_result = await fetch(url, request)
@@ -154,11 +204,20 @@ class Analyzer(BaseAnalyzer):
 
     async def save_volume_images(self, url, request, save_image, loop):
         """Get all images in one volume."""
-        soup, _ = await fetch(url, request)
+        chapter_info_cache = self.config['chapter_info_cache']
+        chapter_info = (chapter_info_cache.get(url)
+                        if chapter_info_cache else None)
+
+        if chapter_info is None:
+            soup, _ = await fetch(url, request)
+            chapter_info = await get_chapter_info(soup, loop)
+
+            if chapter_info_cache:
+                chapter_info_cache.put(url, chapter_info)
 
         image_host_codes = self.config.get('image_host_codes')
 
-        image_urls = await get_image_urls(soup, image_host_codes, loop)
+        image_urls = get_image_urls(chapter_info, image_host_codes)
 
-        for page_num, img_url in enumerate(image_urls, start=1):
-            save_image(page_num, url=img_url)
+        for page_num, (img_url, *mirrors) in enumerate(image_urls, start=1):
+            save_image(page_num, url=img_url, mirrors=mirrors)
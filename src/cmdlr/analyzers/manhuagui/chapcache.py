@@ -0,0 +1,92 @@
+"""Persistent cache of the decoded chapter_info.
+
+Decoding the chapter_info need a volume page fetching and a node.js
+evaluation, so the retries and the resumed downloads reuse the decoded one
+until the `sl.md5` token expired.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+
+
+_KEPT_KEYS = ['files', 'path', 'cid', 'sl']
+
+
+class ChapterInfoCache:
+    """A chapter_info cache keyed by volume url."""
+
+    def __init__(self, dirpath, ttl):
+        """Init.
+
+        Args:
+            dirpath: the cache directory.
+            ttl: seconds a chapter_info can be reused, it will be shorten
+                if the token carry an expire time (`sl.e`).
+
+        """
+        self.dirpath = dirpath
+        self.ttl = ttl
+
+    def __get_filepath(self, vurl):
+        digest = hashlib.sha1(vurl.encode('utf8')).hexdigest()
+
+        return os.path.join(self.dirpath, digest + '.json')
+
+    def __get_expires(self, chapter_info):
+        expires = time.time() + self.ttl
+        token_expires = chapter_info.get('sl', {}).get('e')
+
+        if isinstance(token_expires, (int, float)):
+            expires = min(expires, token_expires)
+
+        return expires
+
+    def get(self, vurl):
+        """Get the cached chapter_info, or None if not available."""
+        try:
+            with open(self.__get_filepath(vurl), encoding='utf8') as f:
+                entry = json.load(f)
+
+        except (OSError, ValueError):
+            return None
+
+        if entry.get('expires', 0) < time.time():
+            return None
+
+        return entry.get('chapter_info')
+
+    def put(self, vurl, chapter_info):
+        """Store a decoded chapter_info, the failure will be ignored."""
+        filepath = self.__get_filepath(vurl)
+        tmp_filepath = '{}.{}.tmp'.format(filepath, os.getpid())
+        entry = {
+            'expires': self.__get_expires(chapter_info),
+            'chapter_info': {key: chapter_info[key] for key in _KEPT_KEYS
+                             if key in chapter_info},
+        }
+
+        try:
+            os.makedirs(self.dirpath, exist_ok=True)
+
+            with open(tmp_filepath, 'w', encoding='utf8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+
+            os.replace(tmp_filepath, filepath)
+
+        except OSError as e:
+            logging.getLogger('cmdlr.manhuagui').warning(
+                'Chapter Info Not Cached: {} ({})'.format(vurl, e))
+
+            if os.path.exists(tmp_filepath):
+                os.remove(tmp_filepath)
+
+    def discard(self, vurl):
+        """Remove the cached chapter_info, e.g., the token was rejected."""
+        try:
+            os.remove(self.__get_filepath(vurl))
+
+        except FileNotFoundError:
+            pass
@@ -95,15 +95,15 @@ Strip `window[...]` and decrypt this one can find the "smh_js".
 
 import re
 import json
-from random import choice
 from urllib.parse import urlencode
+from urllib.parse import urlsplit
 
 from cmdlr.autil import run_in_nodejs
 
 from .sharedjs import get_shared_js
 
 
-async def _get_chapter_info(soup, loop):
+async def get_chapter_info(soup, loop):
     """Get single chapter info in volume entry soup."""
     target_js = soup.find('script', string=re.compile(r'window\["')).string
     encrypted_js = re.sub(r'^window\[.+?\]', '', target_js)
@@ -123,13 +123,11 @@ def _get_normalized_filenames(filenames):
     return [webp_regex.sub('', filename) for filename in filenames]
 
 
-def _get_image_url(filename, chapter_info, image_host_codes):
+def _get_image_url(filename, chapter_info, image_host_code):
     cid = chapter_info['cid']
     md5 = chapter_info['sl']['md5']
     chapter_path = chapter_info['path']
 
-    image_host_code = choice(image_host_codes)
-
     return (
         'https://{image_host_code}.hamreus.com{chapter_path}{filename}?{qs}'
         .format(image_host_code=image_host_code,
@@ -139,15 +137,25 @@ def _get_image_url(filename, chapter_info, image_host_codes):
     )
 
 
-async def get_image_urls(soup, image_host_codes, loop):
-    """Get image's urls from soup and configuration."""
-    chapter_info = await _get_chapter_info(soup, loop)
+def get_image_key(url):
+    """Get the image url without the query, which has a expirable token."""
+    return urlsplit(url)._replace(query='').geturl()
+
+
+def get_image_urls(chapter_info, image_host_codes):
+    """Get image's urls from chapter_info and configuration.
+
+    Returns:
+        A list of the urls on all image hosts for each page, in the order
+        of `image_host_codes`.
 
+    """
     filenames = chapter_info['files']
 
     norm_filenames = _get_normalized_filenames(filenames)
     image_urls = [
-        _get_image_url(filename, chapter_info, image_host_codes)
+        [_get_image_url(filename, chapter_info, image_host_code)
+         for image_host_code in image_host_codes]
         for filename in norm_filenames
     ]
 
@@ -2,8 +2,6 @@
 
 import re
 
-from bs4 import BeautifulSoup
-
 from cmdlr.autil import run_in_nodejs
 
 from .sharedjs import get_shared_js
@@ -14,6 +12,8 @@ async def _get_volumes_data_tag(soup, loop):
     vs_tag = soup.find('input', id='__VIEWSTATE')
 
     if vs_tag:  # 18X only
+        from bs4 import BeautifulSoup
+
         lzstring = vs_tag['value']
         question_js = ('LZString.decompressFromBase64("{lzstring}")'
                        .format(lzstring=lzstring))
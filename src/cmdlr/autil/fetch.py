@@ -1,16 +1,51 @@
 """fetch data and parseing."""
 from collections import namedtuple
 from urllib.parse import urljoin
+from urllib.parse import urlparse
 
-from bs4 import BeautifulSoup
+from ..stats import stats
+from ..metrics import metrics
 
 
 _FetchResult = namedtuple('FetchResult', ['soup', 'absurl'])
 
 
+async def _get_html(url, request, req_kwargs):
+    """Get (binary, final url) of a html resource, use cache if possible."""
+    html_cache = getattr(request, 'html_cache', None)
+
+    if html_cache:
+        host = urlparse(url).netloc
+        cached = html_cache.get(url, req_kwargs)
+
+        if cached:
+            metrics.inc('cmdlr_html_cache_requests_total',
+                        host=host, result='hit')
+
+            return cached
+
+        metrics.inc('cmdlr_html_cache_requests_total',
+                    host=host, result='miss')
+
+    with stats.timer('fetch'):
+        async with request(url, **req_kwargs) as resp:
+            binary = resp.body
+            final_url = str(resp.url)
+
+            if html_cache:
+                html_cache.put(url, req_kwargs, binary, final_url,
+                               request.html_cache_ttl,
+                               resp.headers.get('Cache-Control'))
+
+    return binary, final_url
+
+
 async def fetch(url, request, encoding='utf8', **req_kwargs):
     """Get remote html resource and parse it.
 
+    If the html cache is enabled, the cached page will be used before it
+    expired.
+
     Args:
         url: a remote html resource url
         request: the `request` function in analyzer
@@ -24,12 +59,13 @@ async def fetch(url, request, encoding='utf8', **req_kwargs):
         fetch_result.absurl: A function can re
 
     """
-    async with request(url, **req_kwargs) as resp:
-        binary = await resp.read()
-        base_url = str(resp.url)
+    from bs4 import BeautifulSoup  # deferred: heavy to import
+
+    binary, base_url = await _get_html(url, request, req_kwargs)
 
-    text = binary.decode(encoding, errors='ignore')
-    soup = BeautifulSoup(text, 'html.parser')
+    with stats.timer('html_parse'):
+        text = binary.decode(encoding, errors='ignore')
+        soup = BeautifulSoup(text, 'html.parser')
 
     base_tag = soup.select_one('html > head > base[href]')
 
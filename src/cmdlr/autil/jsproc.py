@@ -2,14 +2,21 @@
 
 import os
 import json
+import atexit
+import threading
 import subprocess
-from tempfile import NamedTemporaryFile
 from shutil import which
 from tempfile import gettempdir
 from functools import lru_cache
+from collections import deque
 
 from ..exception import ExternalDependencyNotFound
+from ..exception import AnalyzerRuntimeError
 from ..log import logger
+from ..stats import stats
+
+
+_STDERR_MAX_LINES = 50
 
 
 @lru_cache()
@@ -49,29 +56,144 @@ def _prepare_node_env():
     return node_cmd, node_path
 
 
-_js_code_template = r'''
+_js_worker_code = r'''
 const { VM } = require('vm2');
+const readline = require('readline');
 
-const vm = new VM({
-    timeout: 1000,
-    sandbox: {},
-    console: 'off',
-});
+const rl = readline.createInterface({input: process.stdin});
+
+rl.on('line', (line) => {
+    let result;
 
-const code = %%CODE%%;
-let evalValue = vm.run(code);
+    try {
+        const vm = new VM({
+            timeout: 1000,
+            sandbox: {},
+            console: 'off',
+        });
 
-if (evalValue === undefined) {
-    evalValue = null;
-}
+        let evalValue = vm.run(JSON.parse(line));
 
-console.log(JSON.stringify(evalValue))
+        if (evalValue === undefined) {
+            evalValue = null;
+        }
+
+        result = {value: evalValue};
+    } catch (e) {
+        result = {error: String(e)};
+    }
+
+    process.stdout.write(JSON.stringify(result) + '\n');
+});
 '''
 
 
+class _NodeWorker:
+    """A long-running node.js process which evaluate one code per line."""
+
+    def __init__(self, node_cmd, node_path):
+        self.proc = subprocess.Popen(
+            [node_cmd, '-e', _js_worker_code],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env={'NODE_PATH': node_path},
+        )
+
+        # keep the recent stderr lines for diagnostics, and keep the pipe
+        # drained so the worker never blocks on it
+        self.stderr_lines = deque(maxlen=_STDERR_MAX_LINES)
+        self.stderr_thread = threading.Thread(
+            target=self.__drain_stderr, daemon=True)
+        self.stderr_thread.start()
+
+    def __drain_stderr(self):
+        for line in self.proc.stderr:
+            self.stderr_lines.append(line)
+
+    def is_alive(self):
+        return self.proc.poll() is None
+
+    def eval(self, js):
+        self.proc.stdin.write(json.dumps(js).encode() + b'\n')
+        self.proc.stdin.flush()
+
+        line = self.proc.stdout.readline()
+
+        if not line:  # the worker exited unexpectedly
+            returncode = self.proc.wait()
+            self.stderr_thread.join(timeout=1)
+
+            raise subprocess.CalledProcessError(
+                returncode, self.proc.args,
+                stderr=b''.join(self.stderr_lines))
+
+        return json.loads(line.decode())
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+class _NodeWorkerPool:
+    """Reuse the node.js workers between calls.
+
+    The calls come from the executor threads, so each thread borrow an idle
+    worker (or create a new one) and give it back after using.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__idle_workers = []
+
+    def __acquire(self):
+        with self.__lock:
+            while self.__idle_workers:
+                worker = self.__idle_workers.pop()
+
+                if worker.is_alive():
+                    return worker
+
+        return _NodeWorker(*_prepare_node_env())
+
+    def __release(self, worker):
+        with self.__lock:
+            self.__idle_workers.append(worker)
+
+    def eval(self, js):
+        worker = self.__acquire()
+
+        try:
+            result = worker.eval(js)
+
+        except Exception:
+            worker.proc.kill()
+            raise
+
+        self.__release(worker)
+
+        return result
+
+    def close(self):
+        """Close all idle workers."""
+        with self.__lock:
+            workers = self.__idle_workers
+            self.__idle_workers = []
+
+        for worker in workers:
+            worker.close()
+
+
+_worker_pool = _NodeWorkerPool()
+atexit.register(_worker_pool.close)
+
+
 def run_in_nodejs(js):
     """Dispatch to external nodejs and get the eval result.
 
+    The node.js processes are kept alive and reused by later calls, so only
+    the first call pay the startup cost.
+
     Args:
         js(str): javascript code without escaped.
 
@@ -79,25 +201,11 @@ def run_in_nodejs(js):
         js return value, already converted from build-in json module.
 
     """
-    node_cmd, node_path = _prepare_node_env()
-
-    full_code = _js_code_template.replace('%%CODE%%', json.dumps(js))
+    with stats.timer('nodejs'):
+        result = _worker_pool.eval(js)
 
-    with NamedTemporaryFile(mode='wt') as f:
-        f.write(full_code)
-        f.flush()
-
-        ret_value = subprocess.run(
-            [
-                node_cmd,
-                f.name,
-                '--require',
-                'vm2'
-            ],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            env={'NODE_PATH': node_path},
-        ).stdout
+    if 'error' in result:
+        raise AnalyzerRuntimeError(
+            'Javascript evaluation failed: {}'.format(result['error']))
 
-    return json.loads(ret_value.decode())
+    return result['value']
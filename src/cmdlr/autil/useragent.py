@@ -3,11 +3,11 @@
 import os
 from functools import lru_cache
 
-from fake_useragent import UserAgent
-
 
 @lru_cache()
 def _fake_useragent():
+    from fake_useragent import UserAgent  # deferred: heavy to import
+
     dirname = os.path.dirname(__file__)
     path = os.path.join(dirname, 'useragent.json')
 
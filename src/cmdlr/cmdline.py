@@ -9,14 +9,6 @@ from .info import VERSION
 
 from .conf import Config
 from .log import init_logging
-from .amgr import AnalyzerManager
-from .cmgr import ComicManager
-from .loopctrl import LoopManager
-
-from .infoprint import print_analyzer_info
-from .infoprint import print_not_matched_urls
-from .infoprint import print_comic_info
-from .infoprint import print_comic_json
 
 
 def _parser_setting():
@@ -46,6 +38,11 @@ def _parser_setting():
         '-s', dest='skip_errors', action='store_true',
         help='allow to skip partial downloading failed in a volume')
 
+    parser.add_argument(
+        '-r', dest='refresh', action='store_true',
+        help=('also re-download the volumes updated by the sites,\n'
+              'only the changed pages will be fetched'))
+
     parser.add_argument(
         '-l', '--list', dest='list', action='store_true',
         help='print subscriptions for human reading')
@@ -59,6 +56,27 @@ def _parser_setting():
         default=argparse.SUPPRESS,
         help='print the analyzer\'s information')
 
+    parser.add_argument(
+        '--verify', dest='verify', action='store_true',
+        help=('verify the downloaded volume files, the broken ones\n'
+              'will be re-downloaded by -d'))
+
+    parser.add_argument(
+        '--plan', dest='plan', action='store_true',
+        help=('estimate the volumes, pages, duration and bandwidth\n'
+              'of a downloading without downloading. with -m, the\n'
+              'metadata will be fetched (but not saved)'))
+
+    parser.add_argument(
+        '--plan-pages', dest='plan_pages', action='store_true',
+        help=('with --plan, fetch the volumes to count the pages,\n'
+              'instead of estimating by history'))
+
+    parser.add_argument(
+        '--daemon', dest='daemon', action='store_true',
+        help=('run as a daemon, process all comics periodically and\n'
+              'accept commands from the control socket'))
+
     parser.add_argument(
         '-c', metavar='FILE', dest='extra_config_path', type=str,
         help=('assign a extra config file and merge in'),
@@ -81,7 +99,22 @@ def _get_args():
         print('Please use -s options with -d options.', file=sys.stderr)
         sys.exit(1)
 
-    if not args.urls and not sys.stdin.isatty():  # Get URLs from stdin
+    if args.refresh and not args.download:
+        print('Please use -r options with -d options.', file=sys.stderr)
+        sys.exit(1)
+
+    if args.plan_pages and not args.plan:
+        print('Please use --plan-pages options with --plan options.',
+              file=sys.stderr)
+        sys.exit(1)
+
+    if args.daemon:
+        if args.urls:
+            print('Please send URLs by the control socket in daemon mode.',
+                  file=sys.stderr)
+            sys.exit(1)
+
+    elif not args.urls and not sys.stdin.isatty():  # Get URLs from stdin
         args.urls = [url for url in sys.stdin.read().split() if url]
 
     elif len(sys.argv) == 1:
@@ -109,12 +142,20 @@ def _get_config(args):
 
 
 def main():
-    """Command ui entry point."""
+    """Command ui entry point.
+
+    The heavy modules are imported only in the subcommand path which really
+    need them. e.g., `-l` and `-j` never import the networking stack.
+    """
     args = _get_args()
     config = _get_config(args)
 
     init_logging(config.logging_dir, config.logging_level)
 
+    from .amgr import AnalyzerManager
+    from .infoprint.azrinfo import print_analyzer_info
+    from .infoprint.azrinfo import print_not_matched_urls
+
     amgr = AnalyzerManager(config)
 
     if 'analyzer_name' in args:
@@ -124,21 +165,59 @@ def main():
 
     print_not_matched_urls(amgr, args.urls)
 
+    from .cmgr import ComicManager
+
     cmgr = ComicManager(config, amgr)
 
     if args.list:
+        from .infoprint.comicinfo import print_comic_info
+
         print_comic_info(cmgr, urls=args.urls, detail_mode=args.urls)
 
     elif args.json:
+        from .infoprint.comicinfo import print_comic_json
+
         print_comic_json(cmgr, urls=args.urls)
 
+    elif args.verify:
+        from .infoprint.verifyinfo import print_verify_info
+
+        print_verify_info(cmgr, urls=args.urls)
+
+    elif args.plan:
+        from .loopctrl import LoopManager
+        from .infoprint.planinfo import print_plan
+
+        lmgr = LoopManager(config, amgr, cmgr)
+        planner, host_state = lmgr.plan(
+            args.urls,
+            {'update_meta': args.update_meta},
+            count_pages=args.plan_pages,
+        )
+
+        print_plan(planner, host_state)
+
+    elif args.daemon:
+        from .daemon import Daemon
+        from .exception import DaemonAlreadyRunning
+
+        try:
+            Daemon(config, amgr, cmgr).start()
+
+        except DaemonAlreadyRunning as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+
     else:
+        from .loopctrl import LoopManager
+
         lmgr = LoopManager(config, amgr, cmgr)
 
         ctrl = {
             'update_meta': args.update_meta,
             'download': args.download,
-            'skip_errors': args.skip_errors
+            'skip_errors': args.skip_errors,
+            'refresh': args.refresh,
         }
 
         lmgr.start(args.urls, ctrl)
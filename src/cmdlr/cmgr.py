@@ -1,11 +1,16 @@
 """Cmdlr multiple comics manager."""
 
 import os
+import sys
+import asyncio
+import pprint
 from collections import namedtuple
+from collections import OrderedDict
 
 from .log import logger
 from .exception import DuplicateComic
 from .exception import NoMatchAnalyzer
+from .exception import ComicDirOccupied
 from .comic import Comic
 from .comic import MetaToolkit
 
@@ -102,24 +107,131 @@ class ComicManager:
 
         return _SelectedResult(exist_comics, non_exist_urls)
 
-    async def new_comic(self, request_pool, url):
-        """Build and register a new comic from url."""
-        parsed_meta = await Comic.get_parsed_meta(
-            request_pool,
-            self.amgr,
-            self.meta_toolkit,
-            url,
+    def __get_normalized_url_list(self, urls):
+        """Normalize urls but keep the duplicated ones."""
+        normalized_urls = []
+
+        for url in urls:
+            try:
+                normalized_urls.append(self.amgr.get_normalized_entry(url))
+
+            except NoMatchAnalyzer:
+                pass
+
+        return normalized_urls
+
+    async def __get_parsed_meta(self, request_pool, semaphore, url):
+        """Get the parsed meta of url, or None if failed."""
+        async with semaphore:
+            try:
+                return await Comic.get_parsed_meta(
+                    request_pool,
+                    self.amgr,
+                    self.meta_toolkit,
+                    url,
+                )
+
+            except Exception as e:
+                if hasattr(e, 'ori_meta'):
+                    extra_info = '>> original metadata:\n{}'.format(
+                        pprint.pformat(e.ori_meta))
+                else:
+                    extra_info = ''
+
+                logger.error(
+                    'Meta Fetch Failed: {}\n{}'.format(url, extra_info),
+                    exc_info=sys.exc_info())
+
+    def __build_comics(self, url_parsed_metas):
+        """Build comics one by one, should be run in the executor.
+
+        Returns:
+            a list of (url, parsed_meta, comic or exception).
+        """
+        results = []
+
+        for url, parsed_meta in url_parsed_metas:
+            try:
+                comic = Comic.build_from_parsed_meta(
+                    self.config, self.amgr, self.meta_toolkit,
+                    parsed_meta, url)
+
+            except Exception as e:
+                results.append((url, parsed_meta, e))
+
+            else:
+                results.append((url, parsed_meta, comic))
+
+        return results
+
+    async def new_comics(self, request_pool, urls):
+        """Build and register new comics from urls in bulk.
+
+        The metadata are fetched with bounded concurrency, then all meta
+        files are written in the executor, and the catalog will be updated
+        once at the end. The already subscribed urls are ignored.
+
+        Returns:
+            a list of new comics.
+
+        """
+        loop = request_pool.loop
+
+        normalized_urls = self.__get_normalized_url_list(urls)
+        unique_urls = list(OrderedDict.fromkeys(normalized_urls))
+        new_urls = [url for url in unique_urls
+                    if url not in self.url_to_comics]
+
+        if not new_urls:
+            return []
+
+        semaphore = asyncio.Semaphore(self.config.book_concurrent, loop=loop)
+        parsed_metas = await asyncio.gather(
+            *[self.__get_parsed_meta(request_pool, semaphore, url)
+              for url in new_urls],
+            loop=loop,
         )
+        url_parsed_metas = [
+            (url, parsed_meta)
+            for url, parsed_meta in zip(new_urls, parsed_metas)
+            if parsed_meta is not None
+        ]
+
+        results = await loop.run_in_executor(
+            None, self.__build_comics, url_parsed_metas)
 
-        if url in self.url_to_comics:
-            raise DuplicateComic('Duplicate comic found. Cancel.')
+        summary = {
+            'created': 0,
+            'duplicated': len(normalized_urls) - len(unique_urls),
+            'occupied': 0,
+            'failed': len(new_urls) - len(url_parsed_metas),
+        }
+        url_to_new_comics = OrderedDict()
+
+        for url, parsed_meta, result in results:
+            if isinstance(result, Comic):
+                summary['created'] += 1
+                url_to_new_comics[url] = result
+
+                logger.info('Meta Created: {name} ({url})'
+                            .format(**parsed_meta, url=url))
+
+            elif isinstance(result, ComicDirOccupied):
+                summary['occupied'] += 1
+
+                logger.error('Comic Dir Occupied: {} ({})'
+                             .format(result, url))
+
+            else:
+                summary['failed'] += 1
 
-        comic = Comic.build_from_parsed_meta(
-            self.config, self.amgr, self.meta_toolkit, parsed_meta, url)
+                logger.error('Meta Create Failed: {} => {}: {}'
+                             .format(url, type(result).__name__, result))
 
-        self.url_to_comics[url] = comic
+        self.url_to_comics.update(url_to_new_comics)
 
-        logger.info('Meta Created: {name} ({url})'
-                    .format(**parsed_meta, url=url))
+        logger.info(
+            'Subscription Summary: {created} created, {duplicated} duplicated,'
+            ' {occupied} occupied, {failed} failed'.format(**summary))
 
-        return comic
+        return list(url_to_new_comics.values())
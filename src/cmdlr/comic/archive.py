@@ -0,0 +1,95 @@
+"""Read the page manifest and pages of an existing volume archive.
+
+The page manifest is the `pages` in `.volume-meta.json` of the archive:
+
+    [{"page": int, "url": str, "size": int, "sha256": str, "ext": str}, ...]
+"""
+
+import json
+import hashlib
+import zipfile
+
+from .imgsniff import is_complete
+
+
+VOLUME_META_FILENAME = '.volume-meta.json'
+
+
+def get_page_filename(page_num, ext):
+    """Get the filename of a page in volume."""
+    return '{page_num:04}{ext}'.format(page_num=page_num, ext=ext)
+
+
+def get_page_entry(page_num, url, size, sha256, ext):
+    """Get a page manifest entry."""
+    return {
+        'page': page_num,
+        'url': url,
+        'size': size,
+        'sha256': sha256,
+        'ext': ext,
+    }
+
+
+def read_volume_meta(filepath):
+    """Read `.volume-meta.json` of an archive, or None if not readable."""
+    try:
+        with zipfile.ZipFile(filepath) as zfile:
+            return json.loads(
+                zfile.read(VOLUME_META_FILENAME).decode('utf8'))
+
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        return None
+
+
+class ArchivedPages:
+    """The reusable pages of an existing volume archive."""
+
+    def __init__(self, filepath, get_image_key=None):
+        """Init by the archive filepath, which may not exist.
+
+        Args:
+            get_image_key: a function to get the key of a page url, the
+                urls with the same key are treated as the same page.
+
+        """
+        self.filepath = filepath
+        self.get_image_key = get_image_key or (lambda url: url)
+
+        meta = read_volume_meta(filepath) or {}
+
+        self.entries = {entry['page']: entry
+                        for entry in meta.get('pages', [])}
+
+    def get(self, page_num, url):
+        """Get the (binary, ext) of a page if the url was not changed.
+
+        Returns:
+            None if the page is not archived, its url was changed, its size
+            or content does not match the manifest, or it is incomplete.
+
+        """
+        entry = self.entries.get(page_num)
+
+        if (not entry or self.get_image_key(entry['url'])
+                != self.get_image_key(url)):
+            return None
+
+        filename = get_page_filename(page_num, entry['ext'])
+
+        try:
+            with zipfile.ZipFile(self.filepath) as zfile:
+                if zfile.getinfo(filename).file_size != entry['size']:
+                    return None
+
+                binary = zfile.read(filename)
+
+        except (OSError, KeyError, EOFError, zipfile.BadZipFile):
+            return None
+
+        if (len(binary) != entry['size']
+                or hashlib.sha256(binary).hexdigest() != entry['sha256']
+                or not is_complete(binary, entry['ext'])):
+            return None
+
+        return binary, entry['ext']
@@ -6,6 +6,7 @@ import sys
 from ..schema import parsed_meta_schema
 from ..log import logger
 from ..exception import ComicDirOccupied
+from ..exception import DiskSpaceInsufficient
 
 from .volfile import ComicVolume
 
@@ -125,29 +126,46 @@ class Comic():
         logger.info('Meta Updated: {name} ({curl})'
                     .format(**parsed_meta, curl=self.url))
 
-    async def download(self, request_pool, skip_errors=False):
+    async def download(self, request_pool, skip_errors=False, refresh=False):
         """Download comic volume in database.
 
         Args:
             skip_errors (bool): allow part of images not be fetched correctly
+            refresh (bool): also re-download the updated volumes, only the
+                changed pages will be fetched
         """
-        comic_volume = ComicVolume(self)
-        wanted_volnames = comic_volume.get_wanted_names()
-
-        for volname in sorted(wanted_volnames):
-            try:
-                await comic_volume.download(
-                    request_pool,
-                    volname,
-                    skip_errors,
-                )
-
-            except Exception:
-                logger.error(
-                    ('Volume Download Failed: {cname}_{vname} ({vurl})'
-                     .format(cname=self.meta['name'],
-                             vname=volname,
-                             vurl=self.meta['volumes'][volname]),
-                     ),
-                    exc_info=sys.exc_info(),
-                )
+        comic_volume = ComicVolume(self, request_pool.config.archive_fsync)
+        comic_volume.remove_orphans()
+
+        wanted_volnames = set(comic_volume.get_wanted_names())
+
+        if refresh:
+            wanted_volnames.update(comic_volume.get_updated_names())
+
+        try:
+            for volname in sorted(wanted_volnames):
+                try:
+                    await comic_volume.download(
+                        request_pool,
+                        volname,
+                        skip_errors,
+                    )
+
+                except DiskSpaceInsufficient as e:
+                    logger.error('Book Deferred: {cname} ({error})'.format(
+                        cname=self.meta['name'], error=e))
+
+                    break
+
+                except Exception:
+                    logger.error(
+                        ('Volume Download Failed: {cname}_{vname} ({vurl})'
+                         .format(cname=self.meta['name'],
+                                 vname=volname,
+                                 vurl=self.meta['volumes'][volname]),
+                         ),
+                        exc_info=sys.exc_info(),
+                    )
+
+        finally:
+            await comic_volume.sync(request_pool.loop)
@@ -0,0 +1,121 @@
+"""Admit the volume downloading by the free disk space."""
+
+import os
+import time
+import shutil
+import asyncio
+
+from ..exception import DiskSpaceInsufficient
+from ..log import logger
+
+
+_CHECK_INTERVAL = 30
+
+
+def _get_existing_dirpath(dirpath):
+    """Get the nearest existing dir, the dir may not be created yet."""
+    dirpath = os.path.abspath(dirpath)
+
+    while not os.path.isdir(dirpath):
+        parent = os.path.dirname(dirpath)
+
+        if parent == dirpath:
+            break
+
+        dirpath = parent
+
+    return dirpath
+
+
+def get_shortages(dirpath_to_bytes, min_free):
+    """Get the devices which free space are not enough.
+
+    Args:
+        dirpath_to_bytes: the bytes will be written to each dirpath.
+        min_free: the bytes should be kept free on each device.
+
+    Returns:
+        A list of (dirpath, free_bytes, required_bytes).
+
+    """
+    devices = {}  # dev: [dirpath, required_bytes]
+
+    for dirpath, nbytes in dirpath_to_bytes.items():
+        dirpath = _get_existing_dirpath(dirpath)
+        device = devices.setdefault(
+            os.stat(dirpath).st_dev, [dirpath, min_free])
+        device[1] += nbytes
+
+    shortages = []
+
+    for dirpath, required_bytes in devices.values():
+        free_bytes = shutil.disk_usage(dirpath).free
+
+        if free_bytes < required_bytes:
+            shortages.append((dirpath, free_bytes, required_bytes))
+
+    return shortages
+
+
+def _get_shortages_text(shortages):
+    return ', '.join(
+        '{} ({:.1f} MiB free, {:.1f} MiB required)'.format(
+            dirpath, free_bytes / 1048576, required_bytes / 1048576)
+        for dirpath, free_bytes, required_bytes in shortages
+    )
+
+
+class DiskSpaceGate:
+    """Admit the volume downloading by the free disk space.
+
+    The gate is shared by all volumes of a run, so they share one pause,
+    and the run waits `max_wait` seconds at most before giving up, instead
+    of waiting for each volume.
+    """
+
+    def __init__(self, min_free, max_wait, loop):
+        """Init.
+
+        Args:
+            min_free: the bytes should be kept free on each device.
+            max_wait: the max seconds to pause, 0 to give up immediately.
+
+        """
+        self.min_free = min_free
+        self.max_wait = max_wait
+        self.loop = loop
+
+        self.__deadline = None  # not None when paused
+
+    async def wait(self, dirpath_to_bytes):
+        """Pause until the free space is enough.
+
+        Raises:
+            DiskSpaceInsufficient: still not enough after the pause expired.
+
+        """
+        while True:
+            shortages = get_shortages(dirpath_to_bytes, self.min_free)
+
+            if not shortages:
+                if self.__deadline is not None:
+                    self.__deadline = None
+                    logger.info('Disk Space Recovered, resume downloading')
+
+                return
+
+            shortages_text = _get_shortages_text(shortages)
+
+            if self.__deadline is None:
+                self.__deadline = time.time() + self.max_wait
+                logger.warning('Disk Space Low, downloading paused: {}'
+                               .format(shortages_text))
+
+            remained = self.__deadline - time.time()
+
+            if remained <= 0:
+                raise DiskSpaceInsufficient(
+                    'Disk space not enough: {}'.format(shortages_text))
+
+            await asyncio.sleep(min(_CHECK_INTERVAL, remained),
+                                loop=self.loop)
@@ -1,33 +1,63 @@
 """Control the downloading of the images of a single volume."""
 
 import os
-
+import json
+import time
+import hashlib
 import asyncio
+from collections import deque
+from collections import namedtuple
 
 from ..exception import NoImagesFound
 from ..exception import InvalidValue
+from ..exception import ExternalDependencyNotFound
 from ..log import logger
+from ..stats import stats
+from ..metrics import metrics
+from .transcode import transcode_in_executor
+from .imgsniff import sniff_extension
+from .imgsniff import is_complete
+from .archive import get_page_filename
+from .archive import get_page_entry
+
+
+VolumeFetchStats = namedtuple(
+    'VolumeFetchStats',
+    ['pages_ok', 'pages_failed', 'bytes', 'elapsed'],
+)
 
 
 class ImageFetchPool:
-    """Control one volume image fetching."""
+    """Control one volume image fetching.
+
+    The pages given by `save_image` are queued until `download()`, so they
+    can be admitted (e.g., by the free disk space) before fetching. Then
+    only a bounded number of them (the in-flight window) are running as
+    tasks at the same time.
+
+    A page will be reused without fetching, if it can be found in the
+    existing archive (`archived_pages`) with the same url, or in the image
+    store. The urls are compared by the `get_image_key` of analyzer, so the
+    expirable tokens in them can be ignored. The image store keeps the
+    transcoded images, so its keys also include the transcode options.
+    """
 
     @staticmethod
     def __get_image_filepath(page_num, ext, dirpath):
-        filename = '{page_num:04}{ext}'.format(page_num=page_num, ext=ext)
-
-        return os.path.join(dirpath, filename)
+        return os.path.join(dirpath, get_page_filename(page_num, ext))
 
     @staticmethod
     def __save_binary(filepath, binary):
         with open(filepath, mode='wb') as f:
             f.write(binary)
 
-    def __init__(self, request_pool, comic, vname, dirpath, skip_errors):
+    def __init__(self, request_pool, comic, vname, dirpath, skip_errors,
+                 image_store=None, archived_pages=None):
         """Init all data."""
         self.analyzer = comic.analyzer
 
         self.request = request_pool.get_request(self.analyzer)
+        self.host_pool = request_pool.host_pool
         self.loop = request_pool.loop
 
         self.cname = comic.meta['name']
@@ -36,12 +66,115 @@ class ImageFetchPool:
         self.vurl = comic.meta['volumes'][vname]
         self.dirpath = dirpath
         self.skip_errors = skip_errors
+        self.image_store = image_store
+        self.archived_pages = archived_pages
 
-        self.save_image_tasks = []
+        analyzer_system = (request_pool.config
+                           .get_analyzer_system_pref(self.analyzer.name))
 
-    async def __save_image_op(self, page_num, url, **request_kwargs):
-        async with self.request(url=url, **request_kwargs) as resp:
-            ext = self.analyzer.get_image_extension(resp)
+        self.window = request_pool.config.total_connections * 2
+        self.transcode_options = analyzer_system.get('image_transcode')
+
+        self.__pending = deque()
+        self.__running = set()
+        self.__sealed = False
+        self.__error = None
+        self.__finished = self.loop.create_future()
+
+        self.__start_time = time.perf_counter()
+        self.__pages_total = 0
+        self.__pages_ok = 0
+        self.__pages_failed = 0
+        self.__bytes = 0
+        self.__page_entries = {}
+        self.__first_url = None
+
+    def __save_archived_image(self, page_num, url):
+        """Place the image from old archive, return False if not reusable."""
+        page = self.archived_pages.get(page_num, url)
+
+        if not page:
+            return False
+
+        binary, ext = page
+        filepath = self.__get_image_filepath(page_num, ext, self.dirpath)
+        self.__save_binary(filepath, binary)
+
+        self.__page_entries[page_num] = self.archived_pages.entries[page_num]
+
+        metrics.inc('cmdlr_archived_pages_reused_total',
+                    analyzer=self.analyzer.name)
+        logger.debug('Image Reused from Archive: {}_{}_{:03}'.format(
+            self.cname, self.vname, page_num))
+
+        return True
+
+    def __get_store_key(self, url):
+        key = self.analyzer.get_image_key(url)
+
+        if self.transcode_options:
+            key += '#transcode=' + json.dumps(self.transcode_options,
+                                              sort_keys=True)
+
+        return key
+
+    def __link_stored_image(self, page_num, url):
+        """Place the image from image store, return False if not stored."""
+        blob_filepath = self.image_store.lookup(self.__get_store_key(url))
+
+        if not blob_filepath:
+            return False
+
+        sha256, ext = os.path.splitext(os.path.basename(blob_filepath))
+        filepath = self.__get_image_filepath(page_num, ext, self.dirpath)
+        self.image_store.link(blob_filepath, filepath)
+
+        self.__page_entries[page_num] = get_page_entry(
+            page_num, url, os.path.getsize(filepath), sha256, ext)
+
+        metrics.inc('cmdlr_image_store_hits_total',
+                    analyzer=self.analyzer.name)
+        logger.debug('Image Reused: {}_{}_{:03}'.format(
+            self.cname, self.vname, page_num))
+
+        return True
+
+    def __get_extension(self, resp, binary):
+        """Get (ext, sniffed_ext) of an image."""
+        sniffed_ext = sniff_extension(binary)
+        ext = self.analyzer.get_image_extension(resp) or sniffed_ext
+
+        return ext, sniffed_ext
+
+    def __is_complete_image(self, resp, binary):
+        ext, sniffed_ext = self.__get_extension(resp, binary)
+
+        if not ext:  # raised by `__fetch_image`, not retried
+            return True
+
+        if is_complete(binary, sniffed_ext or ext):
+            return True
+
+        metrics.inc('cmdlr_images_incomplete_total',
+                    analyzer=self.analyzer.name)
+
+        return False
+
+    async def __fetch_image(self, page_num, url, **request_kwargs):
+        """Fetch a complete image, return (binary, ext, fetched_url).
+
+        The extension come from the `Content-Type` first, and fallback to
+        the magic bytes. The truncated images will be retried by the
+        request as the failed ones. The `fetched_url` may be one of the
+        mirrors.
+        """
+        request = self.request(url=url,
+                               validate_body=self.__is_complete_image,
+                               **request_kwargs)
+
+        async with request as resp:
+            binary = resp.body
+            ext, _ = self.__get_extension(resp, binary)
 
             if not ext:
                 raise InvalidValue(
@@ -49,23 +182,75 @@ class ImageFetchPool:
                     .format(resp.content_type)
                 )
 
-            binary = await resp.read()
+        return binary, ext, request.url
+
+    async def __transcode(self, page_num, binary, ext):
+        """Transcode an image, keep the original one if failed."""
+        try:
+            with stats.timer('transcode'):
+                return await transcode_in_executor(
+                    self.loop, binary, ext, self.transcode_options)
+
+        except (asyncio.CancelledError, ExternalDependencyNotFound):
+            raise
+
+        except Exception as e:
+            logger.warning(
+                'Image Transcode Failed, keep the original: {}_{}_{:03}'
+                ' ({}: {})'.format(self.cname, self.vname, page_num,
+                                   type(e).__name__, e))
+
+            return binary, ext
+
+    async def __save_image_op(self, page_num, url, **request_kwargs):
+        """Save an image, return the fetched bytes."""
+        if self.archived_pages and self.__save_archived_image(page_num, url):
+            return 0
+
+        if self.image_store and self.__link_stored_image(page_num, url):
+            return 0
+
+        with stats.timer('save_image'):
+            binary, ext, fetched_url = await self.__fetch_image(
+                page_num, url, **request_kwargs)
+            size = len(binary)
+            self.host_pool.add_an_image_size(fetched_url, size)
+
+            if self.transcode_options:
+                binary, ext = await self.__transcode(page_num, binary, ext)
 
             filepath = self.__get_image_filepath(page_num, ext, self.dirpath)
-            self.__save_binary(filepath, binary)
 
+            if self.image_store:
+                blob_filepath = self.image_store.put(
+                    self.__get_store_key(url), binary, ext)
+                self.image_store.link(blob_filepath, filepath)
+
+            else:
+                self.__save_binary(filepath, binary)
+
+            self.__page_entries[page_num] = get_page_entry(
+                page_num, url, len(binary),
+                hashlib.sha256(binary).hexdigest(), ext)
+
+            metrics.inc('cmdlr_images_saved_total',
+                        analyzer=self.analyzer.name)
             logger.debug('Image Fetched: {}_{}_{:03}'.format(
                 self.cname, self.vname, page_num))
 
+        return size
+
     async def __save_image_error_process(self,
                                          page_num, url, **request_kwargs):
         try:
-            await self.__save_image_op(page_num, url, **request_kwargs)
+            size = await self.__save_image_op(page_num, url, **request_kwargs)
 
-        except asyncio.CancelledError as e:
-            pass
+        except asyncio.CancelledError:
+            raise
 
         except Exception as e:
+            self.__pages_failed += 1
+
             logger.error(
                 'Image Fetch Failed : {}_{}_{:03} ({} => {}: {})'
                 .format(self.cname, self.vname, page_num,
@@ -75,51 +260,130 @@ class ImageFetchPool:
             if not self.skip_errors:
                 raise e from None
 
-    def get_save_image(self):
-        """Get save_image function."""
-        def save_image(page_num, *, url, **request_kwargs):
+        else:
+            self.__pages_ok += 1
+            self.__bytes += size
+
+    def __fill(self):
+        """Run the pending pages until the in-flight window is full.
+
+        Nothing will run until `download()` be called.
+        """
+        while (self.__sealed
+               and self.__pending
+               and len(self.__running) < self.window
+               and self.__error is None):
+            page_num, url, request_kwargs = self.__pending.popleft()
+
             task = self.loop.create_task(
                 self.__save_image_error_process(
-                    int(page_num),
+                    page_num,
                     url,
                     **request_kwargs,
                 ),
             )
+            task.add_done_callback(self.__on_task_done)
+
+            self.__running.add(task)
+
+    def __on_task_done(self, task):
+        self.__running.discard(task)
+
+        if not task.cancelled() and task.exception():
+            if self.__error is None:  # first failure, stop the others
+                self.__error = task.exception()
+                self.__pending.clear()
+
+                for running_task in self.__running:
+                    running_task.cancel()
+
+        self.__fill()
+        self.__check_finished()
+
+    def __check_finished(self):
+        if not self.__sealed or self.__finished.done():
+            return
 
-            self.save_image_tasks.append(task)
+        if self.__running:
+            return
+
+        if self.__error is not None:
+            self.__finished.set_exception(self.__error)
+
+        elif not self.__pending:
+            self.__finished.set_result(None)
+
+    def get_save_image(self):
+        """Get save_image function."""
+        def save_image(page_num, *, url, **request_kwargs):
+            self.__pages_total += 1
+            self.__first_url = self.__first_url or url
+
+            if self.__error is None:
+                self.__pending.append((int(page_num), url, request_kwargs))
+                self.__fill()
 
         return save_image
 
-    @staticmethod
-    def __cleanup_save_image_tasks(done, pending):
-        """Cancel the pending tasks & raise exception in save_image_tasks."""
-        for task in pending:
+    def cancel(self):
+        """Stop all pending and running pages."""
+        self.__pending.clear()
+
+        for task in self.__running:
             task.cancel()
 
-        for e in [task.exception() for task in done]:
-            if e:
-                raise e from None
+    def get_page_entries(self):
+        """Get the manifest entries of the saved pages, sorted by page."""
+        return [entry for _, entry in sorted(self.__page_entries.items())]
+
+    def get_estimated_bytes(self):
+        """Estimate the volume size, or None if no image sizes known."""
+        if self.__first_url is None:
+            return None
+
+        mean_size = self.host_pool.get_mean_image_size(self.__first_url)
+
+        if mean_size is None:
+            return None
+
+        return int(mean_size * self.__pages_total)
+
+    def get_stats(self):
+        """Get the current VolumeFetchStats."""
+        return VolumeFetchStats(
+            pages_ok=self.__pages_ok,
+            pages_failed=self.__pages_failed,
+            bytes=self.__bytes,
+            elapsed=time.perf_counter() - self.__start_time,
+        )
 
     async def download(self):
-        """Wait all pending download tasks (build by `save_image`) have finish.
+        """Wait all pages (given by `save_image`) have finish.
+
+        The first failure will stop all other pages and be raised after
+        they were stopped, unless `skip_errors` is set.
 
         Returns:
-            True if looking successful
+            a VolumeFetchStats.
 
         """
-        if len(self.save_image_tasks) == 0:
+        if self.__pages_total == 0:
             raise NoImagesFound(
                 'Not found any images in volume: [{}] => [{}] {}'
                 .format(self.cname, self.vname, self.vurl))
 
-        done, pending = await asyncio.wait(
-            self.save_image_tasks,
-            loop=self.loop,
-            return_when=asyncio.FIRST_EXCEPTION,
-        )
+        self.__sealed = True
+        self.__fill()
+        self.__check_finished()
 
-        self.__cleanup_save_image_tasks(done, pending)  # cleanup & raise
+        try:
+            await self.__finished
 
-        at_least_one = len(os.listdir(self.dirpath)) >= 1
-        if len(pending) == 0 and at_least_one:
-            return True
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+
+        self.host_pool.add_a_volume(
+            self.analyzer.name, self.__first_url, self.__pages_total)
+
+        return self.get_stats()
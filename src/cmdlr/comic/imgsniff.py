@@ -0,0 +1,94 @@
+"""Detect the image format by magic bytes and check its completeness."""
+
+import struct
+
+
+_TRAILING_PADDING = b'\x00\r\n\t '
+_JPEG_TAIL_WINDOW = 4096  # some servers append bytes after the EOI marker
+
+
+def _is_iso_bmff_complete(binary):
+    """Walk the top-level boxes, all of them should end in the binary."""
+    offset = 0
+    length = len(binary)
+
+    while offset < length:
+        if offset + 8 > length:
+            return not binary[offset:].rstrip(_TRAILING_PADDING)
+
+        size = struct.unpack('>I', binary[offset:offset + 4])[0]
+
+        if size == 0:  # extend to the end of file
+            return True
+
+        if size == 1:  # 64-bit largesize
+            if offset + 16 > length:
+                return False
+
+            size = struct.unpack('>Q', binary[offset + 8:offset + 16])[0]
+
+        if size < 8:
+            return False
+
+        offset += size
+
+    return offset == length
+
+
+def sniff_extension(binary):
+    """Get the image extension by magic bytes, or None if unknown."""
+    if binary.startswith(b'\xff\xd8\xff'):
+        return '.jpg'
+
+    elif binary.startswith(b'\x89PNG\r\n\x1a\n'):
+        return '.png'
+
+    elif binary.startswith((b'GIF87a', b'GIF89a')):
+        return '.gif'
+
+    elif binary.startswith(b'RIFF') and binary[8:12] == b'WEBP':
+        return '.webp'
+
+    elif binary.startswith(b'BM') and len(binary) >= 6:
+        return '.bmp'
+
+    elif binary[4:8] == b'ftyp' and (b'avif' in binary[8:32]
+                                     or b'avis' in binary[8:32]):
+        return '.avif'
+
+
+def is_complete(binary, ext):
+    """Check the binary is a complete image of ext.
+
+    Returns:
+        False if it look like truncated or not a image of ext. True if
+        complete or ext is not a checkable format.
+
+    """
+    if ext not in ['.jpg', '.png', '.gif', '.webp', '.bmp', '.avif']:
+        return True
+
+    if sniff_extension(binary) != ext:
+        return False
+
+    if ext == '.jpg':
+        return b'\xff\xd9' in binary[-_JPEG_TAIL_WINDOW:]
+
+    elif ext == '.png':
+        return b'IEND\xaeB`\x82' in binary[-64:]
+
+    elif ext == '.gif':
+        return binary.rstrip(_TRAILING_PADDING).endswith(b';')
+
+    elif ext == '.webp':
+        riff_size = struct.unpack('<I', binary[4:8])[0]
+
+        return len(binary) >= riff_size + 8
+
+    elif ext == '.bmp':
+        file_size = struct.unpack('<I', binary[2:6])[0]
+
+        return len(binary) >= file_size
+
+    elif ext == '.avif':
+        return _is_iso_bmff_complete(binary)
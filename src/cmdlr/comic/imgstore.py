@@ -0,0 +1,166 @@
+"""Content-addressed image store shared by all volumes and comics.
+
+Layout:
+
+    <store>/blob/<hh>/<sha256><ext>     image content, named by its hash
+    <store>/url/<hh>/<sha1 of key>      text file of "<sha256><ext>"
+    <store>/staging/                    temporary volume dirs
+
+The key is the image url, or a stable form of it given by the analyzer.
+
+The volume staging dirs are created inside the store, so the images can be
+hardlinked from blobs instead of copied.
+
+The least recently used blobs will be pruned by `prune()` (once per volume,
+in an executor) when the total size of blobs exceed the limit. The blobs
+still linked by a staging volume are kept.
+"""
+
+import os
+import shutil
+import hashlib
+import threading
+from functools import lru_cache
+
+
+def _write_atomic(filepath, binary):
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+    tmp_filepath = '{}.{}.tmp'.format(filepath, os.getpid())
+
+    with open(tmp_filepath, 'wb') as f:
+        f.write(binary)
+
+    os.replace(tmp_filepath, filepath)
+
+
+class ImageStore:
+    """A size-bounded content-addressed image store."""
+
+    def __init__(self, dirpath, max_size):
+        """Init.
+
+        Args:
+            dirpath: the store directory.
+            max_size: max total size of blobs in bytes.
+
+        """
+        self.dirpath = dirpath
+        self.max_size = max_size
+        self.staging_dirpath = os.path.join(dirpath, 'staging')
+
+        os.makedirs(self.staging_dirpath, exist_ok=True)
+
+        self.__total_size = None  # counted by the first `prune()`
+        self.__prune_lock = threading.Lock()
+
+    def __iter_blobs(self):
+        for dirpath, _, filenames in os.walk(os.path.join(self.dirpath,
+                                                          'blob')):
+            for filename in filenames:
+                filepath = os.path.join(dirpath, filename)
+
+                try:
+                    stat = os.stat(filepath)
+
+                except FileNotFoundError:
+                    continue
+
+                yield filepath, stat
+
+    def __prune(self):
+        blobs = sorted(self.__iter_blobs(), key=lambda blob: blob[1].st_mtime)
+        total_size = sum(stat.st_size for _, stat in blobs)
+
+        for filepath, stat in blobs:
+            if total_size <= self.max_size * 0.9:
+                break
+
+            if stat.st_nlink > 1:  # still linked by a staging volume
+                continue
+
+            try:
+                os.remove(filepath)
+
+            except FileNotFoundError:
+                pass
+
+            total_size -= stat.st_size
+
+        self.__total_size = total_size
+
+    def prune(self):
+        """Remove the least recently used blobs until under 90% limit.
+
+        It walks the whole store if the total size is unknown or over the
+        limit, so should be run in an executor. The concurrent calls are
+        skipped.
+        """
+        if (self.__total_size is not None
+                and self.__total_size <= self.max_size):
+            return
+
+        if not self.__prune_lock.acquire(blocking=False):
+            return
+
+        try:
+            self.__prune()
+
+        finally:
+            self.__prune_lock.release()
+
+    def __get_url_filepath(self, key):
+        digest = hashlib.sha1(key.encode('utf8')).hexdigest()
+
+        return os.path.join(self.dirpath, 'url', digest[:2], digest)
+
+    def __get_blob_filepath(self, blob_name):
+        return os.path.join(self.dirpath, 'blob', blob_name[:2], blob_name)
+
+    def lookup(self, key):
+        """Get the blob filepath of a stored key, or None if not stored."""
+        url_filepath = self.__get_url_filepath(key)
+
+        try:
+            with open(url_filepath, encoding='utf8') as f:
+                blob_filepath = self.__get_blob_filepath(f.read().strip())
+
+            os.utime(blob_filepath)  # mark as recently used
+
+        except FileNotFoundError:
+            if os.path.exists(url_filepath):  # the blob was pruned
+                os.remove(url_filepath)
+
+            return None
+
+        return blob_filepath
+
+    def put(self, key, binary, ext):
+        """Store the binary of a key, and return the blob filepath."""
+        blob_name = hashlib.sha256(binary).hexdigest() + ext
+        blob_filepath = self.__get_blob_filepath(blob_name)
+
+        if not os.path.exists(blob_filepath):
+            _write_atomic(blob_filepath, binary)
+
+            if self.__total_size is not None:
+                self.__total_size += len(binary)
+
+        _write_atomic(self.__get_url_filepath(key), blob_name.encode('utf8'))
+
+        return blob_filepath
+
+    @staticmethod
+    def link(blob_filepath, filepath):
+        """Place a blob at filepath, by hardlink if possible."""
+        try:
+            os.link(blob_filepath, filepath)
+
+        except OSError:  # cross device or not supported
+            shutil.copyfile(blob_filepath, filepath)
+
+
+@lru_cache()
+def get_image_store(dirpath, max_size):
+    """Get the shared image store of a dirpath."""
+    return ImageStore(dirpath, max_size)
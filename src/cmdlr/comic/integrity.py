@@ -0,0 +1,196 @@
+"""Verify the volume archives and keep an integrity index per comic.
+
+The index is a `.integrity-index.json` in the comic dir:
+
+    {<filename>: {"size": int, "mtime_ns": int, "problems": [str, ...]}}
+
+A record is valid only if the size and the mtime of the archive are not
+changed, so a later verify only re-check the new or changed archives.
+"""
+
+import io
+import os
+import json
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from ..jsona import from_json_filepath
+from ..jsona import to_json_filepath
+from .imgsniff import is_complete
+from .archive import VOLUME_META_FILENAME
+
+
+_INDEX_FILENAME = '.integrity-index.json'
+
+
+def _is_decodable(binary, ext):
+    """Check the image can be decoded, fully by Pillow if installed."""
+    if not is_complete(binary, ext):
+        return False
+
+    try:
+        from PIL import Image
+
+    except ImportError:
+        return True
+
+    try:
+        with Image.open(io.BytesIO(binary)) as image:
+            image.load()
+
+    except Exception:
+        return False
+
+    return True
+
+
+def verify_archive(filepath):
+    """Verify a volume archive, run in the worker processes.
+
+    Returns:
+        A list of problem descriptions, empty if the archive is fine.
+
+    """
+    problems = []
+
+    try:
+        with zipfile.ZipFile(filepath) as zfile:
+            bad_filename = zfile.testzip()
+
+            if bad_filename is not None:
+                return ['crc mismatch: {}'.format(bad_filename)]
+
+            filenames = zfile.namelist()
+            page_filenames = [filename for filename in filenames
+                              if not filename.startswith('.')]
+
+            if VOLUME_META_FILENAME in filenames:
+                meta = json.loads(
+                    zfile.read(VOLUME_META_FILENAME).decode('utf8'))
+                page_count = meta.get('page_count')
+
+                if (page_count is not None
+                        and page_count != len(page_filenames)):
+                    problems.append('page count mismatch: {} != {}'.format(
+                        len(page_filenames), page_count))
+
+            for filename in page_filenames:
+                ext = os.path.splitext(filename)[1].lower()
+
+                if not _is_decodable(zfile.read(filename), ext):
+                    problems.append('undecodable image: {}'.format(filename))
+
+    except (zipfile.BadZipFile, zipfile.LargeZipFile,
+            OSError, EOFError, ValueError) as err:
+        return ['broken archive: {}'.format(err)]
+
+    return problems
+
+
+class IntegrityIndex:
+    """The integrity records of the archives in a comic dir."""
+
+    def __init__(self, comic_dir):
+        """Init."""
+        self.comic_dir = comic_dir
+        self.filepath = os.path.join(comic_dir, _INDEX_FILENAME)
+
+        try:
+            self.records = from_json_filepath(self.filepath)
+
+        except (OSError, ValueError):
+            self.records = {}
+
+    def __get_stat(self, filename):
+        try:
+            return os.stat(os.path.join(self.comic_dir, filename))
+
+        except FileNotFoundError:
+            return None
+
+    def get_valid_record(self, filename, stat=None):
+        """Get the record if the archive not changed after verified."""
+        record = self.records.get(filename)
+        stat = stat or self.__get_stat(filename)
+
+        if (record and stat
+                and record.get('size') == stat.st_size
+                and record.get('mtime_ns') == stat.st_mtime_ns):
+            return record
+
+    def is_broken(self, filename):
+        """Check the archive was verified and found broken."""
+        record = self.get_valid_record(filename)
+
+        return bool(record and record.get('problems'))
+
+    def set_record(self, filename, stat, problems):
+        """Set the verified result of an archive."""
+        self.records[filename] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'problems': problems,
+        }
+
+    def save(self):
+        """Save the index, and drop the records of removed archives."""
+        self.records = {
+            filename: record for filename, record in self.records.items()
+            if os.path.exists(os.path.join(self.comic_dir, filename))
+        }
+
+        to_json_filepath(self.records, self.filepath)
+
+
+VerifyResult = namedtuple(
+    'VerifyResult', ['comic', 'filename', 'problems', 'cached'])
+
+
+def verify_comics(comics, max_workers=None):
+    """Verify all the archives of comics across a process pool.
+
+    Only the archives which new or changed after last verify will be
+    re-checked.
+
+    Returns:
+        A list of VerifyResult.
+
+    """
+    results = []
+    pending = []  # (comic, index, filename, stat)
+
+    for comic in comics:
+        index = IntegrityIndex(comic.dir)
+
+        for filename in sorted(os.listdir(comic.dir)):
+            if not filename.endswith('.cbz'):
+                continue
+
+            stat = os.stat(os.path.join(comic.dir, filename))
+            record = index.get_valid_record(filename, stat)
+
+            if record is None:
+                pending.append((comic, index, filename, stat))
+
+            else:
+                results.append(VerifyResult(
+                    comic, filename, record['problems'], cached=True))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            filepaths = [os.path.join(comic.dir, filename)
+                         for comic, _, filename, _ in pending]
+            all_problems = executor.map(verify_archive, filepaths,
+                                        chunksize=4)
+
+            for (comic, index, filename, stat), problems in zip(
+                    pending, all_problems):
+                index.set_record(filename, stat, problems)
+                results.append(VerifyResult(
+                    comic, filename, problems, cached=False))
+
+    for index in {id(index): index for _, index, _, _ in pending}.values():
+        index.save()
+
+    return results
@@ -13,6 +13,8 @@ Following show what the comic meta file data structure look like.
         'volumes_checked_time': (datetime) volumes set checked time.
         'volumes_modified_time': (datetime) volumes set modified time.
 
+        'tags': (list of str) optional, user-defined tags for priority.
+
         'volumes': (dict)
             key (str): a unique, sortable, and human readable volume name.
             value (str): a unique volume url.
@@ -0,0 +1,126 @@
+"""Transcode the fetched images (require `Pillow`).
+
+The transcoding is cpu-bound, so it run in a process pool to keep the event
+loop and the downloading going.
+"""
+
+import io
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from ..exception import ExternalDependencyNotFound
+
+
+_FORMATS = {
+    'jpeg': ('JPEG', '.jpg'),
+    'webp': ('WEBP', '.webp'),
+    'png': ('PNG', '.png'),
+}
+
+_PIL_FORMAT_EXTS = {
+    'JPEG': '.jpg',
+    'WEBP': '.webp',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'BMP': '.bmp',
+}
+
+
+@lru_cache()
+def _check_pillow():
+    try:
+        import PIL  # NOQA
+
+    except ImportError:
+        raise ExternalDependencyNotFound(
+            'Can not found `Pillow` for image transcoding,'
+            ' try `pip3 install cmdlr[transcode]`.') from None
+
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+
+    if _executor is None:
+        _executor = ProcessPoolExecutor()
+
+    return _executor
+
+
+def shutdown_executor():
+    """Shutdown the process pool if it was started."""
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def _to_rgb(image):
+    """Flatten the transparent area onto white for jpeg."""
+    from PIL import Image
+
+    if image.mode in ('RGBA', 'LA', 'P'):
+        rgba_image = image.convert('RGBA')
+        background = Image.new('RGB', rgba_image.size, (255, 255, 255))
+        background.paste(rgba_image, mask=rgba_image.split()[-1])
+
+        return background
+
+    return image.convert('RGB')
+
+
+def transcode(binary, ext, options):
+    """Transcode an image, run in the worker processes.
+
+    Args:
+        binary: the original image.
+        ext: the original extension.
+        options: a dict of `format`, `quality` and `max_height`.
+
+    Returns:
+        (binary, ext) of the transcoded image.
+
+    """
+    from PIL import Image
+
+    target_format = options.get('format')
+    quality = options.get('quality', 85)
+    max_height = options.get('max_height')
+
+    image = Image.open(io.BytesIO(binary))
+    oversize = max_height and image.height > max_height
+
+    if not target_format and not oversize:
+        return binary, ext
+
+    if target_format:
+        pil_format, new_ext = _FORMATS[target_format]
+
+    elif image.format in _PIL_FORMAT_EXTS:
+        pil_format, new_ext = image.format, _PIL_FORMAT_EXTS[image.format]
+
+    else:  # can not write back, keep the original
+        return binary, ext
+
+    if oversize:
+        width = max(round(image.width * max_height / image.height), 1)
+        image = image.resize((width, max_height), Image.LANCZOS)
+
+    if pil_format == 'JPEG':
+        image = _to_rgb(image)
+
+    output = io.BytesIO()
+    image.save(output, format=pil_format, quality=quality, optimize=True)
+
+    return output.getvalue(), new_ext
+
+
+async def transcode_in_executor(loop, binary, ext, options):
+    """Transcode an image in the process pool."""
+    _check_pillow()
+
+    return await loop.run_in_executor(
+        _get_executor(), transcode, binary, ext, options)
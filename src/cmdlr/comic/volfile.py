@@ -1,21 +1,55 @@
 """Comic volume file related function."""
 
 import os
+import time
 import zipfile
 from datetime import datetime
+import tempfile
 from tempfile import TemporaryDirectory
 
 from ..jsona import to_json_filepath
 from ..log import logger
+from ..stats import stats
+from ..metrics import metrics
 from .ifpool import ImageFetchPool
+from .imgstore import get_image_store
+from .integrity import IntegrityIndex
+from .archive import VOLUME_META_FILENAME
+from .archive import ArchivedPages
+from .archive import read_volume_meta
+
+
+_ORPHAN_MIN_AGE = 6 * 3600  # seconds a temporary archive must be untouched
+
+
+def _fsync_dir(dirpath):
+    fd = os.open(dirpath, os.O_RDONLY)
+
+    try:
+        os.fsync(fd)
+
+    finally:
+        os.close(fd)
 
 
 class ComicVolume:
     """Volume generate."""
 
-    def __init__(self, comic):
-        """Init volume related data."""
+    tmp_suffix = '.tmp'
+
+    def __init__(self, comic, fsync_policy='none'):
+        """Init volume related data.
+
+        Args:
+            comic: the Comic object.
+            fsync_policy: 'none', 'file' (fsync each archive) or 'dir'
+                (also fsync the comic dir by `sync()`).
+
+        """
         self.comic = comic
+        self.fsync_policy = fsync_policy
+
+        self.__unsynced = False
 
     def __get_filename(self, name):
         comic_name = self.comic.meta['name']
@@ -27,8 +61,20 @@ class ComicVolume:
 
         return os.path.join(self.comic.dir, filename)
 
+    def __is_reusable(self, name):
+        """Check the pages of the archived volume can be reused.
+
+        The volume found broken by `--verify` will be fully re-downloaded.
+        """
+        filename = self.__get_filename(name)
+
+        if not os.path.exists(self.__get_filepath(name)):
+            return False
+
+        return not IntegrityIndex(self.comic.dir).is_broken(filename)
+
     def get_wanted_names(self):
-        """Get volumn names which not downloaded."""
+        """Get volumn names which not downloaded or found broken."""
         filename_name_mapper = {
             self.__get_filename(name): name
             for name in self.comic.meta['volumes'].keys()
@@ -36,58 +82,190 @@ class ComicVolume:
 
         all_filenames = filename_name_mapper.keys()
         exist_filenames = set(os.listdir(self.comic.dir))
+        index = IntegrityIndex(self.comic.dir)
 
         return [filename_name_mapper[filename]
                 for filename in all_filenames
-                if filename not in exist_filenames]
+                if filename not in exist_filenames
+                or index.is_broken(filename)]
+
+    def get_updated_names(self):
+        """Get volumn names which downloaded but the url was changed.
+
+        The analyzer report a volume was updated (e.g., a new scan) by given
+        a new url with the same volume name.
+        """
+        updated_names = []
+
+        for name, vurl in self.comic.meta['volumes'].items():
+            filepath = self.__get_filepath(name)
+
+            if not os.path.exists(filepath):
+                continue
+
+            volume_meta = read_volume_meta(filepath)
+
+            if volume_meta and volume_meta.get('volume_url') != vurl:
+                updated_names.append(name)
+
+        return updated_names
+
+    def remove_orphans(self):
+        """Remove the temporary archives left by the killed processes.
+
+        A recently modified one may be still written by another process
+        (e.g., the daemon and a cron run), so only the stale ones be removed.
+        """
+        for filename in os.listdir(self.comic.dir):
+            if filename.endswith('.cbz' + self.tmp_suffix):
+                filepath = os.path.join(self.comic.dir, filename)
+
+                try:
+                    age = time.time() - os.stat(filepath).st_mtime
+
+                    if age < _ORPHAN_MIN_AGE:
+                        continue
 
-    def __save_meta(self, dirpath, name):
-        filepath = os.path.join(dirpath, '.volume-meta.json')
+                    os.remove(filepath)
+
+                except FileNotFoundError:  # renamed or removed by the owner
+                    continue
+
+                logger.info('Orphan Removed: {}'.format(filepath))
+
+    async def sync(self, loop):
+        """Fsync the comic dir if any archives were renamed in it.
+
+        Only for 'dir' policy, one fsync cover all the volumes before.
+        """
+        if self.fsync_policy == 'dir' and self.__unsynced:
+            self.__unsynced = False
+
+            await loop.run_in_executor(None, _fsync_dir, self.comic.dir)
+
+    def __save_meta(self, dirpath, name, page_entries):
+        filepath = os.path.join(dirpath, VOLUME_META_FILENAME)
 
         to_json_filepath(
             {'comic_url': self.comic.url,
              'volume_url': self.comic.meta['volumes'][name],
              'comic_name': self.comic.meta['name'],
              'volume_name': name,
-             'archived_time': datetime.utcnow()},
+             'page_count': len(page_entries),
+             'archived_time': datetime.utcnow(),
+             'pages': page_entries},
             filepath,
         )
 
     def __convert_to_cbz(self, from_dir, name):
         """Convert dir to cbz format."""
         filepath = self.__get_filepath(name)
-        tmp_filepath = filepath + '.tmp'
+        tmp_filepath = filepath + self.tmp_suffix
+
+        with stats.timer('convert_to_cbz'), open(tmp_filepath, 'wb') as f:
+            with zipfile.ZipFile(f, 'w') as zfile:
+                for filename in os.listdir(from_dir):
+                    real_path = os.path.join(from_dir, filename)
+                    in_zip_path = filename
 
-        with zipfile.ZipFile(tmp_filepath, 'w') as zfile:
-            for filename in os.listdir(from_dir):
-                real_path = os.path.join(from_dir, filename)
-                in_zip_path = filename
+                    zfile.write(real_path, in_zip_path)
 
-                zfile.write(real_path, in_zip_path)
+            if self.fsync_policy != 'none':
+                f.flush()
+                os.fsync(f.fileno())
 
         os.rename(tmp_filepath, filepath)
+        self.__unsynced = True
+
+        metrics.inc('cmdlr_volumes_archived_total',
+                    analyzer=self.comic.analyzer.name)
         logger.info('Archived: {}'.format(filepath))
 
     async def download(self, request_pool, name, skip_errors):
-        """Download a volume by volname."""
-        with TemporaryDirectory(prefix='cmdlr_') as tmpdir:
+        """Download a volume by volname.
+
+        If the volume was archived (and not found broken by `--verify`), the
+        pages which url not changed will be reused, and the archive will be
+        rewritten in place.
+
+        The downloading will be paused when the free disk space is not
+        enough, and raise DiskSpaceInsufficient if it keep not enough. The
+        estimated volume size is checked before any page be fetched.
+        """
+        config = request_pool.config
+        loop = request_pool.loop
+        disk_space_gate = request_pool.disk_space_gate
+        image_store_dir = config.image_store_dir
+
+        if image_store_dir:
+            image_store = get_image_store(image_store_dir,
+                                          config.image_store_max_size)
+            staging_dirpath = image_store.staging_dirpath
+
+        else:
+            image_store = None
+            staging_dirpath = config.temp_dir
+
+            if staging_dirpath:
+                os.makedirs(staging_dirpath, exist_ok=True)
+
+        await disk_space_gate.wait(
+            {staging_dirpath or tempfile.gettempdir(): 0, self.comic.dir: 0},
+        )
+
+        with TemporaryDirectory(prefix='cmdlr_',
+                                dir=staging_dirpath) as tmpdir:
             vurl = self.comic.meta['volumes'][name]
             analyzer = self.comic.analyzer
 
+            filepath = self.__get_filepath(name)
+            archived_pages = (ArchivedPages(filepath, analyzer.get_image_key)
+                              if self.__is_reusable(name) else None)
+
             image_pool = ImageFetchPool(
-                request_pool, self.comic, name, tmpdir, skip_errors)
+                request_pool, self.comic, name, tmpdir, skip_errors,
+                image_store, archived_pages)
             save_image = image_pool.get_save_image()
 
             request = request_pool.get_request(analyzer)
-            loop = request_pool.loop
 
-            await analyzer.save_volume_images(url=vurl,
-                                              request=request,
-                                              save_image=save_image,
-                                              loop=loop)
+            try:
+                await analyzer.save_volume_images(url=vurl,
+                                                  request=request,
+                                                  save_image=save_image,
+                                                  loop=loop)
+
+                estimated_bytes = image_pool.get_estimated_bytes()
+
+                if estimated_bytes:
+                    await disk_space_gate.wait(
+                        {tmpdir: estimated_bytes,
+                         self.comic.dir: estimated_bytes},
+                    )
+
+            except BaseException:
+                image_pool.cancel()
+                raise
+
+            try:
+                fetch_stats = await image_pool.download()
+
+            except Exception:
+                analyzer.on_volume_images_failed(vurl)
+                raise
+
+            if fetch_stats.pages_failed:
+                analyzer.on_volume_images_failed(vurl)
+
+            logger.debug(
+                'Volume Fetched: {}_{} ({} ok, {} failed, {} bytes, {:.1f}s)'
+                .format(self.comic.meta['name'], name, *fetch_stats))
+
+            if fetch_stats.pages_ok >= 1:
+                self.__save_meta(tmpdir, name, image_pool.get_page_entries())
 
-            images_download_success = await image_pool.download()
+                await loop.run_in_executor(
+                    None, self.__convert_to_cbz, tmpdir, name)
 
-            if images_download_success:
-                self.__save_meta(tmpdir, name)
-                self.__convert_to_cbz(tmpdir, name)
+        if image_store:
+            await loop.run_in_executor(None, image_store.prune)
@@ -2,12 +2,12 @@
 
 import os
 import re
+import hashlib
+import pickle
+from functools import lru_cache
 
-from .schema import config_schema
-
-from .yamla import from_yaml_string
-from .yamla import from_yaml_filepath
 from .merge import merge_dict
+from .info import VERSION
 
 
 _DEFAULT_CONFIG_YAML = """
@@ -51,6 +51,8 @@ network:
   delay: 2.5
 
   timeout: 300               # timeout of a trying of a request
+  connect_timeout: 30        # timeout of connecting to a host
+  read_timeout: 60           # timeout of waiting for any data from a host
   max_try: 5                 # max try for a single request
   total_connections: 12      # all requests in the same time in whole system
   per_host_connections: 2    # all requests in the same time in a host
@@ -63,12 +65,218 @@ network:
   ## if null, stop to using any socks proxy
   socks_proxy: null
 
+  ## limit the download rate (KiB/s) of all requests
+  ##
+  ## a number, or a list of time-of-day rules, the first matched one be
+  ## applied (`rate: null` or no rule matched mean no limit):
+  ##   bandwidth:
+  ##   - {from: '09:00', to: '18:00', rate: 512}
+  ##   - {from: '18:00', to: '09:00', rate: null}
+  ##
+  ## analyzers can set an extra limit by `system.bandwidth`.
+  ##
+  ## if null, no limit.
+  bandwidth: null
+
+  ## hedge the slow requests
+  ##
+  ## if a request has no response headers after the `percentile` of the
+  ## recent elapsed seconds of its host, send a second request (to a mirror
+  ## if any), use the first succeeded one and cancel the other. At most
+  ## `budget` hedges per request be sent to a host.
+  ##
+  ## Example:
+  ##
+  ## hedge:
+  ##   percentile: 95   # 1 ~ 100
+  ##   budget: 0.05     # 0 ~ 1
+  ##
+  ## analyzers can override it by `system.hedge`.
+  ##
+  ## if null, never hedge.
+  hedge: null
+
+  ## abort a transfer which is slower than `min_rate` (KiB/s) in each
+  ## `window` seconds, then retry it. The waiting for the bandwidth limits
+  ## not be counted.
+  ##
+  ## if null, never abort the slow transfers.
+  stall:
+    min_rate: 1
+    window: 30
+
 
 
 book_concurrent: 6   # how many books can processing parallel
 
 
 
+## the order of books to be processed
+priority:
+  ## the criteria, the earlier ones take precedence
+  ##
+  ## new:     the newly subscribed books first
+  ## tags:    the books with heavier tags first (see `tag_weights`)
+  ## ongoing: the not finished books first
+  ## missing: the books with fewer missing volumes first
+  order: [new, tags, ongoing, missing]
+
+  ## weights of the user-defined tags, e.g., {reading: 10, someday: -10}
+  ##
+  ## the tags of a book can be set by `"tags": [...]` in the
+  ## `.comic-meta.json` of the book.
+  tag_weights: {}
+
+
+
+## on-disk cache of the html pages fetched by analyzers (images excluded)
+html_cache:
+  ## the cache directory
+  ##
+  ## if null, stop using the html cache.
+  dir: null
+
+  ## seconds a cached page can be reused. the `max-age` of `Cache-Control`
+  ## header can shorten it, and `no-store` / `no-cache` disable it.
+  ##
+  ## analyzers can override it by `system.html_cache_ttl`.
+  ttl: 600
+
+  ## max total size (MiB), the least recently used pages will be evicted
+  max_size: 100
+
+
+
+## performance statistics
+stats:
+  ## log a statistics summary line per `log_interval` seconds
+  ##
+  ## if 0, only log the summary once when a run finished.
+  log_interval: 60
+
+  ## save the statistics into a json file when a run finished
+  ##
+  ## if null, stop saving the statistics file.
+  filepath: null
+
+
+
+## prometheus-style metrics
+metrics:
+  ## write metrics into a file when a run finished, for the textfile
+  ## collector of node_exporter. e.g., /var/lib/node_exporter/cmdlr.prom
+  ##
+  ## if null, stop writing the metrics file.
+  textfile: null
+
+  ## serve metrics at `http://<listen>/metrics` while running.
+  ## e.g., 127.0.0.1:9464
+  ##
+  ## if null, stop serving the metrics.
+  listen: null
+
+
+
+## daemon mode (`cmdlr --daemon`)
+daemon:
+  ## run a cycle for all comics per `interval` seconds, the first cycle
+  ## will start immediately.
+  ##
+  ## if 0, only run the jobs requested from the control socket.
+  interval: 3600
+
+  ## what should be done in the cycles, same as `-m`, `-d`, `-s` and `-r`
+  ## flags
+  update_meta: true
+  download: true
+  skip_errors: false
+  refresh: false
+
+  ## the unix socket to control the daemon
+  ##
+  ## if null, use `<cache_dir>/daemon.sock`
+  control_socket: null
+
+
+
+## transcode the images after fetched, require `Pillow`
+## (`pip3 install cmdlr[transcode]`)
+##
+## Example:
+##
+## image_transcode:
+##   format: jpeg       # jpeg, webp, png, or null to keep the format
+##   quality: 85        # 1 ~ 100, for jpeg and webp
+##   max_height: 2000   # downscale the taller images, or null
+##
+## analyzers can override it by `system.image_transcode`.
+##
+## if null, stop transcoding.
+image_transcode: null
+
+
+
+## durability of the archived volumes
+##
+## none: let the os flush the archives (fastest)
+## file: fsync each archive before it be renamed to the final name
+## dir:  like `file`, and fsync the book directory after all volumes of
+##       the book were archived, so the renames survive a power loss
+archive_fsync: none
+
+
+
+## the dir to stage the downloading volumes, e.g., on a fast local ssd
+##
+## if null, use the system temporary dir. not used if `image_store_dir` is
+## set (the volumes are staged inside the image store).
+temp_dir: null
+
+
+
+## keep some free disk space on the temporary dir and data dirs
+disk_space:
+  ## the downloading will be paused if the free space is less than
+  ## `min_free` MiB plus the estimated size of the volume.
+  ##
+  ## the estimation based on the page count and the recent image sizes of
+  ## the image host.
+  min_free: 512
+
+  ## give up the rest volumes of the book if the free space still not
+  ## enough after paused `max_wait` seconds. the pause is shared by all
+  ## books in a run, the later books give up immediately once it expired.
+  ##
+  ## if 0, give up immediately.
+  max_wait: 600
+
+
+
+## content-addressed image store
+##
+## share the downloaded images between all volumes and comics. the images
+## of already stored urls will not be fetched again, and the identical
+## images only be stored once (volumes are staged by hardlinks).
+##
+## if null, stop using the image store.
+image_store_dir: null
+
+## max size (MiB) of the image store, the least recently used images will
+## be pruned when exceeded.
+image_store_max_size: 1024
+
+
+
+## the file to keep the performance statistics of hosts between runs.
+##
+## the hosts warm start from the latency, image size and error delay of
+## previous runs, and `--plan` estimate the duration by the throughput.
+##
+## if null, use `<cache_dir>/host-state.json`.
+host_state_file: null
+
+
+
 ## extra analyzer directory
 ##
 ## assign a exist directory and put analyzers module or package in here.
@@ -87,9 +295,17 @@ analyzer_dir: null
 ##       enabled: true            # default: true
 ##       delay: 1.0               # default: <network.delay>
 ##       timeout: 120             # default: <network.timeout>
+##       connect_timeout: 30      # default: <network.connect_timeout>
+##       read_timeout: 60         # default: <network.read_timeout>
+##       stall: null              # default: <network.stall>
 ##       max_try: 5               # default: <network.max_try>
 ##       per_host_connections: 2  # default: <network.per_host_connections>
 ##       socks_proxy: null        # default: <network.socks_proxy>
+##       bandwidth: null          # default: null (same format as
+##                                #   <network.bandwidth>)
+##       hedge: null              # default: <network.hedge>
+##       html_cache_ttl: 600      # default: <html_cache.ttl>
+##       image_transcode: null    # default: <image_transcode>
 ##
 ##     # Optional
 ##     <analyzer1_pref1>: ...
@@ -101,6 +317,72 @@ analyzer_pref: {}
 """.strip()
 
 
+@lru_cache()
+def _get_default_config():
+    from .schema import config_schema
+    from .yamla import from_yaml_string
+
+    return config_schema(from_yaml_string(_DEFAULT_CONFIG_YAML))
+
+
+def _compile_config(base_config, filepaths):
+    """Parse and validate config files then merge them into base_config."""
+    from .schema import config_schema
+    from .yamla import from_yaml_filepath
+
+    config = base_config
+
+    for filepath in filepaths:
+        incoming_config = config_schema(from_yaml_filepath(filepath))
+        merged_config = merge_dict(config, incoming_config)
+
+        config = config_schema(merged_config)
+
+    return config
+
+
+def _get_cache_key(filepaths):
+    """Get a key represent the content of all config sources."""
+    hasher = hashlib.sha1()
+    hasher.update(repr(VERSION).encode('utf8'))
+    hasher.update(_DEFAULT_CONFIG_YAML.encode('utf8'))
+
+    for filepath in filepaths:
+        hasher.update(os.path.abspath(filepath).encode('utf8'))
+
+        with open(filepath, 'rb') as f:
+            hasher.update(hashlib.sha1(f.read()).digest())
+
+    return hasher.hexdigest()
+
+
+def _load_cached_config(cache_filepath, key):
+    try:
+        with open(cache_filepath, 'rb') as f:
+            cache = pickle.load(f)
+
+        if cache['key'] == key:
+            return cache['config']
+
+    except Exception:  # missing or broken cache, just ignore it
+        pass
+
+
+def _save_cached_config(cache_filepath, key, config):
+    tmp_filepath = '{}.{}.tmp'.format(cache_filepath, os.getpid())
+
+    try:
+        os.makedirs(os.path.dirname(cache_filepath), exist_ok=True)
+
+        with open(tmp_filepath, 'wb') as f:
+            pickle.dump({'key': key, 'config': config}, f)
+
+        os.replace(tmp_filepath, cache_filepath)
+
+    except OSError:  # cache is optional
+        pass
+
+
 def _normalize_path(path):
     return os.path.expanduser(path)
 
@@ -140,6 +422,14 @@ class Config:
         'config.yaml',
     )
 
+    default_cache_dirpath = os.path.join(
+        os.getenv(
+            'XDG_CACHE_HOME',
+            os.path.join(os.path.expanduser('~'), '.cache'),
+        ),
+        'cmdlr',
+    )
+
     @classmethod
     def __build_config_file(cls, filepath):
         """Create a config file template at specific filepath."""
@@ -159,31 +449,70 @@ class Config:
                 'enabled': True,
                 'delay': network['delay'],
                 'timeout': network['timeout'],
+                'connect_timeout': network['connect_timeout'],
+                'read_timeout': network['read_timeout'],
+                'stall': network['stall'],
                 'max_try': network['max_try'],
                 'per_host_connections': network['per_host_connections'],
                 'socks_proxy': network['socks_proxy'],
+                'bandwidth': None,
+                'hedge': network['hedge'],
+                'html_cache_ttl': self.__config['html_cache']['ttl'],
+                'image_transcode': self.__config['image_transcode'],
             },
         }
 
     def __init__(self):
-        """Init the internal __config variable."""
-        default_config = from_yaml_string(_DEFAULT_CONFIG_YAML)
-        self.__config = config_schema(default_config)
+        """Init the internal variables.
+
+        The default config will be parsed only when it is necessary.
+        """
+        self.__loaded_config = None
+        self.__raw_analyzer_prefs = {}
+
+    @property
+    def __config(self):
+        if self.__loaded_config is None:
+            self.__loaded_config = _get_default_config()
+
+        return self.__loaded_config
 
     def load_or_build(self, *filepaths):
         """Load and update internal config from specific filepaths.
 
         If filepath in filepaths not exists, build it with default
         configuration.
+
+        The parsed & validated result will be cached in
+        `default_cache_dirpath`, and reused until any of those files (or
+        cmdlr itself) was changed.
         """
         for filepath in filepaths:
             if not os.path.exists(filepath):
                 type(self).__build_config_file(filepath)
 
-            incoming_config = config_schema(from_yaml_filepath(filepath))
-            merged_config = merge_dict(self.__config, incoming_config)
+        self.__raw_analyzer_prefs.clear()
+
+        if self.__loaded_config is not None:  # not cacheable, has a base
+            self.__loaded_config = _compile_config(
+                self.__loaded_config,
+                filepaths,
+            )
+
+            return
+
+        cache_filepath = os.path.join(
+            type(self).default_cache_dirpath,
+            'config-cache.pickle',
+        )
+        key = _get_cache_key(filepaths)
+        config = _load_cached_config(cache_filepath, key)
+
+        if config is None:
+            config = _compile_config(_get_default_config(), filepaths)
+            _save_cached_config(cache_filepath, key, config)
 
-            self.__config = config_schema(merged_config)
+        self.__loaded_config = config
 
     @property
     def incoming_data_dir(self):
@@ -226,11 +555,139 @@ class Config:
         """Get total connection count."""
         return self.__config['network']['total_connections']
 
+    @property
+    def priority_order(self):
+        """Get the criteria of the book priority."""
+        return self.__config['priority']['order']
+
+    @property
+    def priority_tag_weights(self):
+        """Get the weights of the user-defined tags."""
+        return self.__config['priority']['tag_weights']
+
+    @property
+    def bandwidth(self):
+        """Get the global bandwidth limit."""
+        return self.__config['network']['bandwidth']
+
     @property
     def book_concurrent(self):
         """Get book concurrent count."""
         return self.__config['book_concurrent']
 
+    @property
+    def stats_log_interval(self):
+        """Get the interval of statistics summary logging."""
+        return self.__config['stats']['log_interval']
+
+    @property
+    def stats_filepath(self):
+        """Get the filepath of statistics json file."""
+        filepath = self.__config['stats']['filepath']
+
+        if filepath:
+            return _normalize_path(filepath)
+
+    @property
+    def metrics_textfile(self):
+        """Get the filepath of metrics textfile."""
+        textfile = self.__config['metrics']['textfile']
+
+        if textfile:
+            return _normalize_path(textfile)
+
+    @property
+    def metrics_listen(self):
+        """Get the listen address of metrics endpoint."""
+        return self.__config['metrics']['listen']
+
+    @property
+    def html_cache_dir(self):
+        """Get the html cache dir."""
+        dirpath = self.__config['html_cache']['dir']
+
+        if dirpath:
+            return _normalize_path(dirpath)
+
+    @property
+    def html_cache_max_size(self):
+        """Get the max size of html cache in bytes."""
+        return self.__config['html_cache']['max_size'] * 1024 * 1024
+
+    @property
+    def archive_fsync(self):
+        """Get the fsync policy of archives."""
+        return self.__config['archive_fsync']
+
+    @property
+    def temp_dir(self):
+        """Get the dir to stage the downloading volumes."""
+        temp_dir = self.__config['temp_dir']
+
+        if temp_dir:
+            return _normalize_path(temp_dir)
+
+    @property
+    def disk_min_free(self):
+        """Get the min free disk space in bytes."""
+        return self.__config['disk_space']['min_free'] * 1024 * 1024
+
+    @property
+    def disk_max_wait(self):
+        """Get the max seconds to wait for free disk space."""
+        return self.__config['disk_space']['max_wait']
+
+    @property
+    def image_store_max_size(self):
+        """Get the max size of image store in bytes."""
+        return self.__config['image_store_max_size'] * 1024 * 1024
+
+    @property
+    def image_store_dir(self):
+        """Get the image store dir."""
+        image_store_dir = self.__config['image_store_dir']
+
+        if image_store_dir:
+            return _normalize_path(image_store_dir)
+
+    @property
+    def host_state_filepath(self):
+        """Get the host state file path."""
+        filepath = self.__config['host_state_file']
+
+        if filepath:
+            return _normalize_path(filepath)
+
+        return os.path.join(type(self).default_cache_dirpath,
+                            'host-state.json')
+
+    @property
+    def daemon_interval(self):
+        """Get the interval between two cycles of daemon."""
+        return self.__config['daemon']['interval']
+
+    @property
+    def daemon_ctrl(self):
+        """Get the ctrl of the cycles of daemon."""
+        daemon = self.__config['daemon']
+
+        return {
+            'update_meta': daemon['update_meta'],
+            'download': daemon['download'],
+            'skip_errors': daemon['skip_errors'],
+            'refresh': daemon['refresh'],
+        }
+
+    @property
+    def daemon_control_socket(self):
+        """Get the control socket path of daemon."""
+        control_socket = self.__config['daemon']['control_socket']
+
+        if control_socket:
+            return _normalize_path(control_socket)
+
+        return os.path.join(type(self).default_cache_dirpath, 'daemon.sock')
+
     def is_enabled_analyzer(self, analyzer_name):
         """Check a analyzer_name is enabled."""
         system = self.get_analyzer_system_pref(analyzer_name)
@@ -238,25 +695,34 @@ class Config:
         return system['enabled']
 
     def get_raw_analyzer_pref(self, analyzer_name):
-        """Get user setting for an analyzer, include "system"."""
-        default_analyzer_pref = self.__get_default_analyzer_pref()
-        user_analyzer_pref = (self
-                              .__config['analyzer_pref']
-                              .get(analyzer_name, {}))
-
-        raw_analyzer_pref = merge_dict(
-            default_analyzer_pref,
-            user_analyzer_pref,
-        )
+        """Get user setting for an analyzer, include "system".
+
+        The result are memoized, caller should not modify it.
+        """
+        raw_analyzer_pref = self.__raw_analyzer_prefs.get(analyzer_name)
+
+        if raw_analyzer_pref is None:
+            default_analyzer_pref = self.__get_default_analyzer_pref()
+            user_analyzer_pref = (self
+                                  .__config['analyzer_pref']
+                                  .get(analyzer_name, {}))
+
+            raw_analyzer_pref = merge_dict(
+                default_analyzer_pref,
+                user_analyzer_pref,
+            )
+
+            self.__raw_analyzer_prefs[analyzer_name] = raw_analyzer_pref
 
         return raw_analyzer_pref
 
     def get_analyzer_pref(self, analyzer_name):
         """Get user setting for analyzer, without "system"."""
-        analyzer_pref = self.get_raw_analyzer_pref(analyzer_name)
-        analyzer_pref.pop('system')
-
-        return analyzer_pref
+        return {
+            key: value
+            for key, value in self.get_raw_analyzer_pref(analyzer_name).items()
+            if key != 'system'
+        }
 
     def get_analyzer_system_pref(self, analyzer_name):
         """Get "system" part of user setting for analyzer."""
@@ -0,0 +1,304 @@
+"""Run cmdlr as a long-running daemon.
+
+The daemon keep the analyzers, the comic library, the http sessions and the
+node.js workers warm, so the incremental works only pay the cost of the
+network requests.
+
+It accept commands from a unix socket, one command per line, and reply a
+json object per line:
+
+    add URL [URL ...]   subscribe (and download, if enabled) those urls
+    run [URL ...]       run a cycle now, for those urls or all comics
+    rescan              reload the comic library from data dirs
+    status              get the status of the daemon
+    stop                stop the daemon after the current job
+
+Example:
+
+    $ echo 'add https://example.com/path/to/book' | nc -U <control_socket>
+"""
+
+import os
+import sys
+import errno
+import socket
+import json
+import time
+import signal
+import asyncio
+from collections import deque
+from datetime import datetime
+
+from .reqpool import RequestPool
+from .cmgr import ComicManager
+from .loopctrl import LoopManager
+from .exception import NoMatchAnalyzer
+from .exception import DaemonAlreadyRunning
+from .log import logger
+
+
+def _remove_stale_socket(socket_path):
+    """Remove the socket left by a dead daemon.
+
+    Raises:
+        DaemonAlreadyRunning: a daemon is still listening on the socket.
+
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        sock.connect(socket_path)
+
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            return
+
+        elif e.errno == errno.ECONNREFUSED:
+            os.remove(socket_path)
+
+            return
+
+        raise
+
+    finally:
+        sock.close()
+
+    raise DaemonAlreadyRunning(
+        'Another daemon is running on: {}'.format(socket_path))
+
+
+class _Job:
+    """A unit of work in the daemon's queue."""
+
+    def __init__(self, kind, urls=(), ctrl=None):
+        self.kind = kind
+        self.urls = list(urls)
+        self.ctrl = ctrl
+
+    def __str__(self):
+        if self.urls:
+            return '{} ({} urls)'.format(self.kind, len(self.urls))
+
+        return self.kind
+
+
+class Daemon:
+    """Keep the states warm and process the comics periodically."""
+
+    def __init__(self, config, amgr, cmgr):
+        """Init the daemon."""
+        self.config = config
+        self.amgr = amgr
+        self.lmgr = LoopManager(config, amgr, cmgr)
+        self.loop = self.lmgr.loop
+
+        self.__jobs = deque()
+        self.__jobs_changed = asyncio.Event(loop=self.loop)
+        self.__current_job = None
+        self.__current_task = None
+        self.__stopping = False
+
+        self.__next_cycle_time = None
+        self.__finished_jobs = 0
+
+    def __put_job(self, job):
+        self.__jobs.append(job)
+        self.__jobs_changed.set()
+
+    def __stop(self, cancel_current=False):
+        if self.__stopping and not cancel_current:
+            return
+
+        logger.info('Daemon stopping...')
+
+        self.__stopping = True
+        self.__jobs_changed.set()
+
+        if cancel_current and self.__current_task:
+            self.__current_task.cancel()
+
+    async def __execute(self, request_pool, job):
+        if job.kind == 'rescan':
+            self.lmgr.cmgr = ComicManager(self.config, self.amgr)
+
+        else:
+            await self.lmgr.run(request_pool, job.urls, job.ctrl)
+
+    async def __run_jobs(self, request_pool):
+        while not self.__stopping:
+            if not self.__jobs:
+                self.__jobs_changed.clear()
+                await self.__jobs_changed.wait()
+
+                continue
+
+            job = self.__jobs.popleft()
+
+            logger.info('Daemon job start: {}'.format(job))
+
+            self.__current_job = job
+            self.__current_task = self.loop.create_task(
+                self.__execute(request_pool, job))
+
+            try:
+                await self.__current_task
+
+            except asyncio.CancelledError:
+                logger.info('Daemon job cancelled: {}'.format(job))
+
+            except Exception:
+                logger.error('Daemon job failed: {}'.format(job),
+                             exc_info=sys.exc_info())
+
+            else:
+                logger.info('Daemon job finished: {}'.format(job))
+
+            finally:
+                self.__current_job = None
+                self.__current_task = None
+                self.__finished_jobs += 1
+
+    async def __schedule(self):
+        interval = self.config.daemon_interval
+
+        if not interval:
+            return
+
+        while True:
+            if not any(job.kind == 'cycle' for job in self.__jobs):
+                self.__put_job(_Job('cycle', ctrl=self.config.daemon_ctrl))
+
+            self.__next_cycle_time = time.time() + interval
+            await asyncio.sleep(interval, loop=self.loop)
+
+    def __get_status(self):
+        next_cycle_time = self.__next_cycle_time
+
+        return {
+            'running': (str(self.__current_job)
+                        if self.__current_job else None),
+            'queued': [str(job) for job in self.__jobs],
+            'finished_jobs': self.__finished_jobs,
+            'comics': len(self.lmgr.cmgr.url_to_comics),
+            'next_cycle': (datetime.fromtimestamp(next_cycle_time).isoformat()
+                           if next_cycle_time else None),
+        }
+
+    def __execute_command(self, line):
+        command, *args = line.split()
+
+        if command == 'add':
+            if not args:
+                return {'error': 'need at least one url'}
+
+            not_matched_urls = []
+
+            for url in args:
+                try:
+                    self.amgr.get_name(url)
+
+                except NoMatchAnalyzer:
+                    not_matched_urls.append(url)
+
+            if not_matched_urls:
+                return {'error': 'no analyzer matched',
+                        'urls': not_matched_urls}
+
+            ctrl = dict(self.config.daemon_ctrl, update_meta=False)
+            self.__put_job(_Job('add', args, ctrl))
+
+        elif command == 'run':
+            self.__put_job(_Job('run', args, self.config.daemon_ctrl))
+
+        elif command == 'rescan':
+            self.__put_job(_Job('rescan'))
+
+        elif command == 'status':
+            return self.__get_status()
+
+        elif command == 'stop':
+            self.__stop()
+
+        else:
+            return {'error': 'unknown command: {}'.format(command)}
+
+        return {'ok': True}
+
+    async def __handle_client(self, reader, writer):
+        try:
+            while True:
+                line = (await reader.readline()).decode().strip()
+
+                if not line:
+                    break
+
+                response = self.__execute_command(line)
+
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+
+        except ConnectionError:
+            pass
+
+        finally:
+            writer.close()
+
+    async def __main(self):
+        socket_path = self.config.daemon_control_socket
+        socket_dir = os.path.dirname(socket_path)
+
+        if socket_dir:
+            os.makedirs(socket_dir, exist_ok=True)
+
+        _remove_stale_socket(socket_path)
+
+        # restrict the socket before listening, nobody can connect earlier
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            sock.bind(socket_path)
+            os.chmod(socket_path, 0o600)
+
+        except BaseException:
+            sock.close()
+            raise
+
+        server = await asyncio.start_unix_server(
+            self.__handle_client,
+            sock=sock,
+            loop=self.loop,
+        )
+
+        logger.info('Daemon started, control socket: {}'.format(socket_path))
+
+        request_pool = RequestPool(self.config, self.loop)
+        schedule_task = self.loop.create_task(self.__schedule())
+
+        try:
+            await self.__run_jobs(request_pool)
+
+        finally:
+            schedule_task.cancel()
+            server.close()
+            await server.wait_closed()
+            await request_pool.close()
+
+            os.remove(socket_path)
+
+    def start(self):
+        """Run the daemon until `stop` command or signals."""
+        for signum in [signal.SIGINT, signal.SIGTERM]:
+            self.loop.add_signal_handler(signum, self.__stop, True)
+
+        services = self.lmgr.start_services()
+
+        try:
+            self.loop.run_until_complete(self.__main())
+
+        finally:
+            self.lmgr.stop_services(services)
+
+            for signum in [signal.SIGINT, signal.SIGTERM]:
+                self.loop.remove_signal_handler(signum)
+
+        logger.info('Daemon stopped.')
@@ -25,6 +25,22 @@ class NoImagesFound(BaseCmdlrException):
     """Not found any images in one volume."""
 
 
+class TransferStalled(BaseCmdlrException):
+    """A response body transfer is slower than the minimum rate."""
+
+
+class ResponseBodyInvalid(BaseCmdlrException):
+    """A response body was rejected, e.g., a truncated image."""
+
+
+class DiskSpaceInsufficient(BaseCmdlrException):
+    """Not enough free disk space to download."""
+
+
+class DaemonAlreadyRunning(BaseCmdlrException):
+    """Another daemon is listening on the control socket."""
+
+
 class ExternalDependencyNotFound(BaseCmdlrException):
     """Not found some external dependency like js runtime."""
 
@@ -1,7 +1,5 @@
-"""Print info in command line interface."""
+"""Print info in command line interface.
 
-from .comicinfo import print_comic_info  # NOQA
-from .comicinfo import print_comic_json  # NOQA
-
-from .azrinfo import print_analyzer_info  # NOQA
-from .azrinfo import print_not_matched_urls  # NOQA
+The printers are imported from their submodules by the caller, so a
+command only imports what it prints.
+"""
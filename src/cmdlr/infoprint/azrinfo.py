@@ -4,8 +4,6 @@ import sys
 from textwrap import indent
 from textwrap import dedent
 
-import yaml
-
 from ..exception import NoMatchAnalyzer
 
 
@@ -19,6 +17,8 @@ def _print_analyzer_list(analyzers):
 
 
 def _print_analyzer_detail(analyzer):
+    import yaml
+
     def get_pref_text(title, pref, name):
         wrapped_pref = {'analyzer_pref': {name: pref}}
         content = indent(
@@ -57,7 +57,7 @@ def _print_analyzer_detail(analyzer):
 
 def print_analyzer_info(amgr, aname_or_url):
     """Print analyzer info by analyzer name or url."""
-    analyzers = sorted(amgr.get_all(), key=lambda analyzer: analyzer.name)
+    analyzers = sorted(amgr.get_all_info(), key=lambda info: info.name)
 
     if aname_or_url is None:
         _print_analyzer_list(analyzers)
@@ -66,7 +66,7 @@ def print_analyzer_info(amgr, aname_or_url):
         analyzer = None
 
         try:
-            analyzer = amgr.get(aname_or_url)
+            analyzer = amgr.get_info(amgr.get_name(aname_or_url))
 
         except NoMatchAnalyzer:
             for local_analyzer in analyzers:
@@ -86,7 +86,7 @@ def print_not_matched_urls(amgr, urls):
     """Print urls without a matched analyzer."""
     for url in urls:
         try:
-            amgr.get(url)
+            amgr.get_name(url)
 
         except NoMatchAnalyzer:
             print('No Matched Analyzer: {}'.format(url), file=sys.stderr)
@@ -2,13 +2,11 @@
 
 from functools import reduce
 
-from wcwidth import wcswidth
-
 from ..comic import ComicVolume
 from ..jsona import get_json_line
 
 
-def _pick_comics(urls, cmgr):
+def pick_comics(urls, cmgr):
     """Pick comics by commandline url."""
     if not urls:
         comics = cmgr.get_all()
@@ -21,6 +19,8 @@ def _pick_comics(urls, cmgr):
 
 def _get_max_width(strings):
     """Get max display width."""
+    from wcwidth import wcswidth
+
     return reduce(
         lambda acc, s: max(acc, wcswidth(s)),
         strings,
@@ -29,6 +29,8 @@ def _get_max_width(strings):
 
 
 def _get_padding_space(string, max_width):
+    from wcwidth import wcswidth
+
     length = max_width - wcswidth(string)
 
     return ' ' * length
@@ -75,7 +77,7 @@ def _print_detail(comic, wanted_vol_names):
 
 def print_comic_info(cmgr, urls, detail_mode):
     """Print comics in comic's pool with selected urls."""
-    comics = _pick_comics(urls, cmgr)
+    comics = pick_comics(urls, cmgr)
 
     if not comics:
         return
@@ -98,7 +100,7 @@ def print_comic_info(cmgr, urls, detail_mode):
 
 def print_comic_json(cmgr, urls):
     """Print all info in jsonline format."""
-    comics = _pick_comics(urls, cmgr)
+    comics = pick_comics(urls, cmgr)
 
     for comic in comics:
         wanted_vol_names = sorted(ComicVolume(comic).get_wanted_names())
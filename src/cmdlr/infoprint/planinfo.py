@@ -0,0 +1,110 @@
+"""Print the plan of a run."""
+
+from collections import Counter
+
+
+_MIB = 1024 * 1024
+
+
+def _get_duration_text(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+
+    if hours:
+        return '{}h{:02}m'.format(hours, minutes)
+
+    elif minutes:
+        return '{}m{:02}s'.format(minutes, seconds)
+
+    return '{}s'.format(seconds)
+
+
+def _get_host_to_pages(book_plans, host_state):
+    """Sum the pages by image hosts.
+
+    The books without counted pages are estimated by the history pages per
+    volume of their analyzers.
+
+    Returns:
+        (host_to_pages, unknown_volumes)
+
+    """
+    host_to_pages = Counter()
+    unknown_volumes = 0
+
+    for book_plan in book_plans:
+        if book_plan.host_to_pages is not None:
+            host_to_pages.update(book_plan.host_to_pages)
+
+            continue
+
+        analyzer_state = host_state.get_analyzer(book_plan.analyzer_name)
+        pages_per_volume = analyzer_state.get('pages_per_volume')
+        image_host = analyzer_state.get('image_host')
+
+        if pages_per_volume and image_host:
+            host_to_pages[image_host] += round(
+                pages_per_volume * book_plan.volumes)
+
+        else:
+            unknown_volumes += book_plan.volumes
+
+    return host_to_pages, unknown_volumes
+
+
+def print_plan(planner, host_state):
+    """Print the wanted works of a plan and the estimated duration."""
+    book_plans = sorted([book_plan for book_plan in planner.book_plans
+                         if book_plan.volumes],
+                        key=lambda book_plan: book_plan.name)
+
+    for book_plan in book_plans:
+        pages_text = ('  {} pages'.format(sum(book_plan.host_to_pages
+                                              .values()))
+                      if book_plan.host_to_pages is not None else '')
+
+        print('{}  +{} volumes{}'.format(
+            book_plan.name, book_plan.volumes, pages_text))
+
+    host_to_pages, unknown_volumes = _get_host_to_pages(
+        book_plans, host_state)
+
+    total_bytes = 0
+    duration = 0
+    unknown_hosts = []
+
+    for netloc, pages in sorted(host_to_pages.items()):
+        state = host_state.get_host(netloc)
+        image_size = state.get('image_size')
+        images_per_sec = state.get('images_per_sec')
+
+        if not image_size or not images_per_sec:
+            unknown_hosts.append(netloc)
+            print('  {}: ~{} pages, no history'.format(netloc, pages))
+
+            continue
+
+        host_bytes = pages * image_size
+        host_seconds = pages / images_per_sec
+
+        total_bytes += host_bytes
+        duration = max(duration, host_seconds)  # hosts run in parallel
+
+        print('  {}: ~{} pages, ~{:.1f} MiB, {:.2f} pages/s, ~{}'.format(
+            netloc, pages, host_bytes / _MIB, images_per_sec,
+            _get_duration_text(host_seconds)))
+
+    print('Plan: {} books, {} volumes, ~{} pages, ~{:.1f} MiB'.format(
+        len(book_plans),
+        sum(book_plan.volumes for book_plan in book_plans),
+        sum(host_to_pages.values()),
+        total_bytes / _MIB,
+    ))
+
+    if duration:
+        print('Estimated: ~{} at ~{:.1f} KiB/s'.format(
+            _get_duration_text(duration), total_bytes / duration / 1024))
+
+    if unknown_volumes or unknown_hosts:
+        print('Not estimated: {} volumes without page counts, {} hosts'
+              ' without history'.format(unknown_volumes, len(unknown_hosts)))
@@ -0,0 +1,31 @@
+"""Verify the comic archives and print the results."""
+
+from ..comic.integrity import verify_comics
+from .comicinfo import pick_comics
+
+
+def print_verify_info(cmgr, urls):
+    """Verify the archives of selected comics and print the broken ones."""
+    comics = pick_comics(urls, cmgr)
+    results = verify_comics(comics)
+
+    broken_results = sorted(
+        [result for result in results if result.problems],
+        key=lambda result: (result.comic.meta['name'], result.filename),
+    )
+
+    for result in broken_results:
+        print('{name}  {filename}'.format(
+            name=result.comic.meta['name'], filename=result.filename))
+
+        for problem in result.problems:
+            print('    - {}'.format(problem))
+
+    checked_count = sum(1 for result in results if not result.cached)
+
+    print('Verified: {} archives ({} checked, {} unchanged), {} broken'
+          .format(len(results), checked_count,
+                  len(results) - checked_count, len(broken_results)))
+
+    if broken_results:
+        print('The broken volumes will be re-downloaded by `-d`.')
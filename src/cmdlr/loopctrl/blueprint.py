@@ -1,86 +1,82 @@
 """Build blueprint for choreographer."""
 
+import heapq
 from itertools import groupby
 
 from .steprunner import book_runner
-from .step import get_url_steps
+from .step import get_new_comic_steps
 from .step import get_comic_steps
+from .priority import get_priority_key
 
 
-def _get_aname_runners_exist(exist_comics, ctrl, request_pool):
+def _get_aname_runners(comics, steps, ctrl, request_pool, is_new):
     skip_errors = ctrl.get('skip_errors')
-    comic_steps = get_comic_steps(ctrl)
+    config = request_pool.config
+
+    if not steps:
+        return []
 
     return [
         (
             comic.analyzer.name,
+            get_priority_key(
+                comic,
+                is_new,
+                config.priority_order,
+                config.priority_tag_weights,
+            ),
             book_runner(
-                comic_steps,
+                steps,
                 [comic, skip_errors, request_pool],
                 comic.url,
             )
         )
-        for comic in exist_comics
+        for comic in comics
     ]
 
 
-def _get_aname_runners_non_exist(non_exist_urls,
-                                 amgr, cmgr, ctrl, request_pool):
-    skip_errors = ctrl.get('skip_errors')
-    url_steps = get_url_steps(ctrl)
-
-    return [
-        (
-            amgr.get(url).name,
-            book_runner(
-                url_steps,
-                [url, skip_errors, request_pool, cmgr],
-                url,
-            )
-        )
-        for url in non_exist_urls
-    ]
-
+def _group_heaps_by_first(tuple_list):
+    """Group the (key, priority, runner) to heaps of (priority, seq, runner).
 
-def _group_second_by_first(tuple_list):
+    The `seq` keep the items comparable even if the priorities are equal.
+    """
     def first(item):
         return item[0]
 
-    return {
-        key: [value for key, value in key_values]
-        for key, key_values
-        in groupby(sorted(tuple_list, key=first), key=first)
-    }
+    aname_to_heap = {}
 
+    for key, key_values in groupby(sorted(tuple_list, key=first), key=first):
+        heap = [(priority, seq, runner)
+                for seq, (_, priority, runner) in enumerate(key_values)]
+        heapq.heapify(heap)
 
-def _get_exist_and_non_exist(cmgr, urls):
-    if urls:
-        exist_comics, non_exist_urls = cmgr.get_selected(urls)
+        aname_to_heap[key] = heap
 
-    else:
-        exist_comics = cmgr.get_all()
-        non_exist_urls = []
+    return aname_to_heap
 
-    return exist_comics, non_exist_urls
 
+def get_aname_to_runners(request_pool, exist_comics, new_comics, ctrl):
+    """Build the resource choreographer need for.
 
-def get_aname_to_runners(cmgr, amgr, request_pool, urls, ctrl):
-    """Build the resource choreographer need for."""
-    exist_comics, non_exist_urls = _get_exist_and_non_exist(cmgr, urls)
+    Returns:
+        A dict of analyzer name to the heap of (priority, seq, runner).
 
-    aname_runners_exist = _get_aname_runners_exist(
-        exist_comics,
+    """
+    aname_runners_new = _get_aname_runners(
+        new_comics,
+        get_new_comic_steps(ctrl),
         ctrl,
         request_pool,
+        is_new=True,
     )
-    aname_runners_non_exist = _get_aname_runners_non_exist(
-        non_exist_urls,
-        amgr,
-        cmgr,
+    aname_runners_exist = _get_aname_runners(
+        exist_comics,
+        get_comic_steps(ctrl),
         ctrl,
         request_pool,
+        is_new=False,
     )
 
-    aname_runners = aname_runners_non_exist + aname_runners_exist
+    aname_runners = aname_runners_new + aname_runners_exist
 
-    return _group_second_by_first(aname_runners)
+    return _group_heaps_by_first(aname_runners)
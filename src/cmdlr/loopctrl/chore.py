@@ -1,16 +1,28 @@
 """The choreographer for awaiting books."""
 
 import asyncio
+import heapq
 from math import ceil
 
 from itertools import chain
 
+from ..metrics import metrics
+
 
 class Choreographer:
     """Choreograph for awaiting books."""
 
     def __init__(self, config, loop, aname_to_runners):
-        """Prepare this choreographer."""
+        """Prepare this choreographer.
+
+        Args:
+            config: the Config object.
+            loop: the event loop.
+            aname_to_runners: a dict of analyzer name to a heap of
+                (priority, seq, runner), the runners with smaller priority
+                will be run first.
+
+        """
         self.loop = loop
 
         self.total_channel = config.book_concurrent
@@ -46,7 +58,7 @@ class Choreographer:
             if idle_count >= 1:
                 for _ in range(idle_count):
                     if runners:
-                        runner = runners.pop()
+                        _, _, runner = heapq.heappop(runners)
                         task = self.loop.create_task(runner)
 
                         if aname not in self.running_aname_to_tasks:
@@ -54,6 +66,14 @@ class Choreographer:
 
                         self.running_aname_to_tasks[aname].append(task)
 
+    def __update_metrics(self):
+        for aname, runners in self.pending_aname_to_runners.items():
+            running_tasks = self.running_aname_to_tasks.get(aname, [])
+
+            metrics.set('cmdlr_books_pending', len(runners), analyzer=aname)
+            metrics.set('cmdlr_books_running', len(running_tasks),
+                        analyzer=aname)
+
     def __concat_running_tasks(self):
         return list(chain.from_iterable(
             tasks for tasks in self.running_aname_to_tasks.values()
@@ -64,13 +84,23 @@ class Choreographer:
         while True:
             self.__clearup_running_tasks()
             self.__runup_new_tasks()
+            self.__update_metrics()
 
             running_tasks = self.__concat_running_tasks()
 
             if running_tasks:
-                await asyncio.wait(running_tasks,
-                                   return_when=asyncio.FIRST_COMPLETED,
-                                   loop=self.loop)
+                try:
+                    await asyncio.wait(running_tasks,
+                                       return_when=asyncio.FIRST_COMPLETED,
+                                       loop=self.loop)
+
+                except asyncio.CancelledError:
+                    for task in running_tasks:
+                        task.cancel()
+
+                    await asyncio.wait(running_tasks, loop=self.loop)
+
+                    raise
 
             else:
                 return
@@ -1,11 +1,19 @@
 """Cmdlr core module."""
 
+import sys
 import asyncio
+import time
 
 from ..reqpool import RequestPool
+from ..stats import stats
+from ..stats import run_monitor
+from ..metrics import metrics
+from ..log import logger
+from ..comic.transcode import shutdown_executor
 
 from .chore import Choreographer
 from .blueprint import get_aname_to_runners
+from .plan import Planner
 
 
 class LoopManager:
@@ -18,16 +26,42 @@ class LoopManager:
         self.cmgr = cmgr
         self.loop = asyncio.get_event_loop()
 
-    async def __get_main_task(self, urls, ctrl):
-        """Get main task for loop."""
-        request_pool = RequestPool(self.config, self.loop)
+    def __finish_run(self, start_time):
+        logger.info(stats.get_summary())
+
+        stats_filepath = self.config.stats_filepath
+
+        if stats_filepath:
+            stats.save(stats_filepath)
+
+        now = time.time()
+
+        metrics.set('cmdlr_last_run_timestamp_seconds', now)
+        metrics.set('cmdlr_last_run_duration_seconds', now - start_time)
+
+        textfile = self.config.metrics_textfile
+
+        if textfile:
+            metrics.write_textfile(textfile)
+
+    async def run(self, request_pool, urls, ctrl):
+        """Run a cycle of processing with an existing request pool."""
+        start_time = time.time()
+        stats.reset()
 
         try:
+            if urls:
+                exist_comics = self.cmgr.get_selected(urls).exist_comics
+                new_comics = await self.cmgr.new_comics(request_pool, urls)
+
+            else:
+                exist_comics = self.cmgr.get_all()
+                new_comics = []
+
             aname_to_runners = get_aname_to_runners(
-                self.cmgr,
-                self.amgr,
                 request_pool,
-                urls,
+                exist_comics,
+                new_comics,
                 ctrl,
             )
             choreographer = Choreographer(
@@ -38,9 +72,124 @@ class LoopManager:
 
             await choreographer.run()
 
+        finally:
+            request_pool.save_host_state()
+            self.__finish_run(start_time)
+
+    async def __plan_urls(self, planner, request_pool, urls):
+        semaphore = asyncio.Semaphore(self.config.book_concurrent,
+                                      loop=self.loop)
+
+        async def plan_url(url):
+            async with semaphore:
+                try:
+                    await planner.plan_url(url, request_pool, self.amgr,
+                                           self.cmgr.meta_toolkit)
+
+                except Exception:
+                    logger.error('Plan Failed: {}'.format(url),
+                                 exc_info=sys.exc_info())
+
+        if urls:
+            await asyncio.gather(*[plan_url(url) for url in urls],
+                                 loop=self.loop)
+
+    async def __get_plan_task(self, planner, request_pool, urls, ctrl):
+        try:
+            if urls:
+                exist_comics, new_urls = self.cmgr.get_selected(urls)
+
+            else:
+                exist_comics, new_urls = self.cmgr.get_all(), []
+
+            aname_to_runners = get_aname_to_runners(
+                request_pool,
+                exist_comics,
+                [],
+                dict(ctrl, planner=planner),
+            )
+            choreographer = Choreographer(
+                self.config,
+                self.loop,
+                aname_to_runners,
+            )
+
+            await asyncio.gather(
+                choreographer.run(),
+                self.__plan_urls(planner, request_pool, new_urls),
+                loop=self.loop,
+            )
+
         finally:
             await request_pool.close()
 
+    def plan(self, urls, ctrl, count_pages):
+        """Plan the works of a run without downloading.
+
+        Returns:
+            (planner, host_state)
+
+        """
+        planner = Planner(count_pages)
+        request_pool = RequestPool(self.config, self.loop)
+
+        self.loop.run_until_complete(
+            self.__get_plan_task(planner, request_pool, urls, ctrl))
+
+        return planner, request_pool.host_state
+
+    async def __get_main_task(self, urls, ctrl):
+        """Get main task for loop."""
+        request_pool = RequestPool(self.config, self.loop)
+
+        try:
+            await self.run(request_pool, urls, ctrl)
+
+        finally:
+            await request_pool.close()
+
+    def start_services(self):
+        """Start the background services of the loop.
+
+        Include the stats monitor and the metrics endpoint.
+
+        Returns:
+            a handle for `stop_services()`.
+
+        """
+        metrics.set_collector('stats', stats.collect_metrics)
+
+        monitor_task = self.loop.create_task(
+            run_monitor(self.loop, self.config.stats_log_interval),
+        )
+        metrics_runner = None
+
+        listen = self.config.metrics_listen
+
+        if listen:
+            metrics_runner = self.loop.run_until_complete(
+                metrics.start_server(listen),
+            )
+
+        return monitor_task, metrics_runner
+
+    def stop_services(self, handle):
+        """Stop the background services of the loop.
+
+        Also shutdown the process pool of image transcoding.
+        """
+        monitor_task, metrics_runner = handle
+
+        monitor_task.cancel()
+        self.loop.run_until_complete(
+            asyncio.wait([monitor_task], loop=self.loop),
+        )
+
+        if metrics_runner:
+            self.loop.run_until_complete(metrics_runner.cleanup())
+
+        shutdown_executor()
+
     def start(self, urls, ctrl):
         """Start main task."""
         main_task = self.__get_main_task(
@@ -48,4 +197,10 @@ class LoopManager:
             ctrl=ctrl,
         )
 
-        self.loop.run_until_complete(main_task)
+        services = self.start_services()
+
+        try:
+            self.loop.run_until_complete(main_task)
+
+        finally:
+            self.stop_services(services)
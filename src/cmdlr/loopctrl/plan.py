@@ -0,0 +1,100 @@
+"""Plan the works of a run without downloading."""
+
+import sys
+import copy
+from collections import Counter
+from collections import namedtuple
+from urllib.parse import urlparse
+
+from ..comic import Comic
+from ..comic import ComicVolume
+from ..log import logger
+
+
+BookPlan = namedtuple(
+    'BookPlan',
+    ['name', 'analyzer_name', 'volumes', 'host_to_pages'],
+)
+
+
+class Planner:
+    """Collect the volumes (and pages) which a run would download."""
+
+    def __init__(self, count_pages):
+        """Init.
+
+        Args:
+            count_pages: also fetch the volume pages to count the images.
+
+        """
+        self.count_pages = count_pages
+        self.book_plans = []
+
+    async def __count_pages(self, analyzer, request_pool, name, vname, vurl):
+        """Get a Counter of image host to page count, None if failed."""
+        host_to_pages = Counter()
+
+        def save_image(page_num, *, url, **request_kwargs):
+            host_to_pages[urlparse(url).netloc] += 1
+
+        try:
+            await analyzer.save_volume_images(
+                url=vurl,
+                request=request_pool.get_request(analyzer),
+                save_image=save_image,
+                loop=request_pool.loop,
+            )
+
+        except Exception:
+            logger.error('Page Count Failed: {}_{} ({})'
+                         .format(name, vname, vurl),
+                         exc_info=sys.exc_info())
+
+            return None
+
+        return host_to_pages
+
+    async def __add_book(self, analyzer, request_pool, name, vname_to_urls):
+        host_to_pages = None
+
+        if self.count_pages:
+            host_to_pages = Counter()
+
+            for vname, vurl in sorted(vname_to_urls.items()):
+                volume_host_to_pages = await self.__count_pages(
+                    analyzer, request_pool, name, vname, vurl)
+
+                if volume_host_to_pages is None:
+                    host_to_pages = None
+
+                    break
+
+                host_to_pages.update(volume_host_to_pages)
+
+        self.book_plans.append(BookPlan(
+            name, analyzer.name, len(vname_to_urls), host_to_pages))
+
+    async def plan_comic(self, comic, request_pool, update_meta):
+        """Plan the wanted volumes of a subscribed comic."""
+        if update_meta:
+            parsed_meta = await Comic.get_parsed_meta(
+                request_pool, comic.amgr, comic.meta_toolkit, comic.url)
+
+            comic = copy.copy(comic)  # never touch the real meta
+            comic.meta = dict(comic.meta, volumes=parsed_meta['volumes'])
+
+        volumes = comic.meta['volumes']
+        vname_to_urls = {vname: volumes[vname] for vname
+                         in ComicVolume(comic).get_wanted_names()}
+
+        await self.__add_book(
+            comic.analyzer, request_pool, comic.meta['name'], vname_to_urls)
+
+    async def plan_url(self, url, request_pool, amgr, meta_toolkit):
+        """Plan a not subscribed url, all volumes are wanted."""
+        parsed_meta = await Comic.get_parsed_meta(
+            request_pool, amgr, meta_toolkit, url)
+
+        await self.__add_book(
+            amgr.get(url), request_pool,
+            parsed_meta['name'], parsed_meta['volumes'])
@@ -0,0 +1,37 @@
+"""The priority of books, decide which books should be processed first."""
+
+from ..comic import ComicVolume
+
+
+def _get_tags_weight(comic, tag_weights):
+    return sum(tag_weights.get(tag, 0) for tag in comic.meta.get('tags', []))
+
+
+def get_priority_key(comic, is_new, order, tag_weights):
+    """Get a sortable key of a book, the smaller one be processed first.
+
+    Args:
+        comic: the Comic object.
+        is_new: the book was just subscribed in this run.
+        order: a list of criteria, the earlier ones take precedence.
+        tag_weights: a dict of tag to weight.
+
+    """
+    key = []
+
+    for criterion in order:
+        if criterion == 'new':
+            key.append(0 if is_new else 1)
+
+        elif criterion == 'tags':
+            key.append(-_get_tags_weight(comic, tag_weights))
+
+        elif criterion == 'ongoing':
+            key.append(1 if comic.meta.get('finished') else 0)
+
+        elif criterion == 'missing':
+            key.append(len(ComicVolume(comic).get_wanted_names()))
+
+    key.append(comic.meta['name'])
+
+    return tuple(key)
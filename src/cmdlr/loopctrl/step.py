@@ -1,31 +1,18 @@
 """The steps of book mission."""
 
 
-def _get_download_step():
+def _get_download_step(refresh):
     """Build a download step."""
     async def download_step(comic, skip_errors, request_pool, *args):
         await comic.download(
             request_pool,
             skip_errors,
+            refresh,
         )
 
     return download_step
 
 
-def _get_new_comic_step():
-    """Build a new comic step.
-
-    Return to:
-        --> download_step
-    """
-    async def new_comic_step(url, skip_errors, request_pool, cmgr, *args):
-        comic = await cmgr.new_comic(request_pool, url)
-
-        return comic, skip_errors, request_pool
-
-    return new_comic_step
-
-
 def _get_update_meta_step():
     """Build a update meta step.
 
@@ -40,15 +27,22 @@ def _get_update_meta_step():
     return update_meta_step
 
 
-def get_url_steps(ctrl):
-    """Get a url steps series."""
+def _get_plan_step(planner, update_meta):
+    """Build a plan step, which only collect the works of the book."""
+    async def plan_step(comic, skip_errors, request_pool, *args):
+        await planner.plan_comic(comic, request_pool, update_meta)
+
+    return plan_step
+
+
+def get_new_comic_steps(ctrl):
+    """Get a steps series of the just created comics."""
     download = ctrl.get('download')
 
     steps = []
-    steps.append(_get_new_comic_step())
 
     if download:
-        steps.append(_get_download_step())
+        steps.append(_get_download_step(refresh=False))
 
     return steps
 
@@ -57,6 +51,11 @@ def get_comic_steps(ctrl):
     """Get a comic steps series."""
     update_meta = ctrl.get('update_meta')
     download = ctrl.get('download')
+    refresh = ctrl.get('refresh')
+    planner = ctrl.get('planner')
+
+    if planner:
+        return [_get_plan_step(planner, update_meta)]
 
     steps = []
 
@@ -64,6 +63,6 @@ def get_comic_steps(ctrl):
         steps.append(_get_update_meta_step())
 
     if download:
-        steps.append(_get_download_step())
+        steps.append(_get_download_step(refresh))
 
     return steps
@@ -0,0 +1,222 @@
+"""Prometheus-style metrics.
+
+The metrics can be exported by two ways:
+
+    1. write a file for the textfile collector of node_exporter, or
+    2. serve a local http endpoint `/metrics` while running.
+
+Usage:
+
+    from .metrics import metrics
+
+    metrics.inc('cmdlr_requests_total', host='example.com', status='200')
+    metrics.set('cmdlr_books_pending', 5, analyzer='example')
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+
+_DEFINITIONS = {
+    'cmdlr_requests_total': (
+        'counter', 'HTTP requests finished, by host and status.'),
+    'cmdlr_request_retries_total': (
+        'counter', 'HTTP requests retried, by host.'),
+    'cmdlr_request_failovers_total': (
+        'counter', 'HTTP requests retried on a mirror, by failed host.'),
+    'cmdlr_request_hedges_total': (
+        'counter', 'HTTP requests hedged by a second one, by slow host.'),
+    'cmdlr_request_hedges_won_total': (
+        'counter', 'Hedged requests finished before the slow one, by host.'),
+    'cmdlr_response_bytes_total': (
+        'counter', 'HTTP response body bytes received, by host.'),
+    'cmdlr_html_cache_requests_total': (
+        'counter', 'Html cache lookups, by host and result (hit / miss).'),
+    'cmdlr_requests_in_flight': (
+        'gauge', 'HTTP requests running now, by host.'),
+    'cmdlr_requests_queued': (
+        'gauge', 'HTTP requests waiting for connection slots, by host.'),
+    'cmdlr_host_recent_elapsed_seconds': (
+        'gauge', 'Mean of recent request elapsed seconds, by host.'),
+    'cmdlr_host_error_delay_seconds': (
+        'gauge', 'Extra delay caused by recent errors, by host.'),
+    'cmdlr_images_saved_total': (
+        'counter', 'Images saved, by analyzer.'),
+    'cmdlr_images_incomplete_total': (
+        'counter', 'Images fetched incomplete (and retried), by analyzer.'),
+    'cmdlr_image_store_hits_total': (
+        'counter', 'Images reused from the image store, by analyzer.'),
+    'cmdlr_archived_pages_reused_total': (
+        'counter', 'Pages reused from the existing archives, by analyzer.'),
+    'cmdlr_volumes_archived_total': (
+        'counter', 'Volumes archived, by analyzer.'),
+    'cmdlr_books_pending': (
+        'gauge', 'Books waiting to be processed, by analyzer.'),
+    'cmdlr_books_running': (
+        'gauge', 'Books processing now, by analyzer.'),
+    'cmdlr_stage_seconds_total': (
+        'counter', 'Seconds spent in each instrumented stage.'),
+    'cmdlr_stage_calls_total': (
+        'counter', 'Calls of each instrumented stage.'),
+    'cmdlr_event_loop_lag_seconds_max': (
+        'gauge', 'Max event loop lag of current run.'),
+    'cmdlr_last_run_timestamp_seconds': (
+        'gauge', 'Unix time of the last finished run.'),
+    'cmdlr_last_run_duration_seconds': (
+        'gauge', 'Duration of the last finished run.'),
+}
+
+
+def _escape(value):
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\n', '\\n')
+            .replace('"', '\\"'))
+
+
+def _format_sample(name, labels, value):
+    if labels:
+        label_text = '{{{}}}'.format(','.join(
+            '{}="{}"'.format(key, _escape(value))
+            for key, value in labels
+        ))
+
+    else:
+        label_text = ''
+
+    return '{}{} {}'.format(name, label_text, repr(float(value)))
+
+
+class Metrics:
+    """Metrics registry."""
+
+    def __init__(self):
+        """Init."""
+        self.__lock = threading.Lock()
+        self.__values = {}
+        self.__collectors = {}
+
+    @staticmethod
+    def __get_key(name, labels):
+        if name not in _DEFINITIONS:
+            raise KeyError('Undefined metric: {}'.format(name))
+
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """Increase a counter or gauge."""
+        key = self.__get_key(name, labels)
+
+        with self.__lock:
+            self.__values[key] = self.__values.get(key, 0) + value
+
+    def dec(self, name, value=1, **labels):
+        """Decrease a gauge."""
+        self.inc(name, -value, **labels)
+
+    @contextmanager
+    def track(self, name, **labels):
+        """Increase a gauge in the block, and decrease it after leaving."""
+        self.inc(name, **labels)
+
+        try:
+            yield
+
+        finally:
+            self.dec(name, **labels)
+
+    def set(self, name, value, **labels):
+        """Set a gauge."""
+        key = self.__get_key(name, labels)
+
+        with self.__lock:
+            self.__values[key] = value
+
+    def set_collector(self, collector_name, collector):
+        """Set a function which generate extra samples when rendering.
+
+        Args:
+            collector_name (str): an id, set again will replace the old one.
+            collector (callable): return a list of (name, labels, value).
+
+        """
+        with self.__lock:
+            self.__collectors[collector_name] = collector
+
+    def __get_samples(self):
+        with self.__lock:
+            values = dict(self.__values)
+            collectors = list(self.__collectors.values())
+
+        for collector in collectors:
+            for name, labels, value in collector():
+                values[self.__get_key(name, labels)] = value
+
+        return values
+
+    def render(self):
+        """Render all metrics in prometheus text format."""
+        name_to_samples = {}
+
+        for (name, labels), value in self.__get_samples().items():
+            name_to_samples.setdefault(name, []).append((labels, value))
+
+        lines = []
+
+        for name in sorted(name_to_samples):
+            mtype, mhelp = _DEFINITIONS[name]
+
+            lines.append('# HELP {} {}'.format(name, mhelp))
+            lines.append('# TYPE {} {}'.format(name, mtype))
+
+            for labels, value in sorted(name_to_samples[name]):
+                lines.append(_format_sample(name, labels, value))
+
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, filepath):
+        """Write metrics to filepath atomically."""
+        dirpath = os.path.dirname(filepath)
+
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+
+        tmp_filepath = '{}.{}.tmp'.format(filepath, os.getpid())
+
+        with open(tmp_filepath, 'w', encoding='utf8') as f:
+            f.write(self.render())
+
+        os.replace(tmp_filepath, filepath)
+
+    async def start_server(self, listen):
+        """Serve `/metrics` on listen address, e.g., '127.0.0.1:9464'.
+
+        Returns:
+            a aiohttp AppRunner, caller should `await runner.cleanup()`.
+
+        """
+        from aiohttp import web
+
+        host, _, port = listen.rpartition(':')
+
+        async def handler(request):
+            return web.Response(
+                text=self.render(),
+                content_type='text/plain',
+                charset='utf-8',
+            )
+
+        app = web.Application()
+        app.router.add_get('/metrics', handler)
+
+        runner = web.AppRunner(app)
+        await runner.setup()
+
+        site = web.TCPSite(runner, host or '127.0.0.1', int(port))
+        await site.start()
+
+        return runner
+
+
+metrics = Metrics()
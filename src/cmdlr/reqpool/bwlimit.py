@@ -0,0 +1,90 @@
+"""Limit the download rate by a token bucket of bytes."""
+
+import asyncio
+from datetime import datetime
+
+from ..stats import stats
+
+
+def _parse_time_of_day(text):
+    hour, minute = text.split(':')
+
+    return int(hour) * 60 + int(minute)
+
+
+def _parse_rules(bandwidth):
+    """Get a list of (from_minute, to_minute, bytes_per_sec or None)."""
+    if not isinstance(bandwidth, list):
+        bandwidth = [{'from': '00:00', 'to': '00:00', 'rate': bandwidth}]
+
+    return [
+        (_parse_time_of_day(rule['from']),
+         _parse_time_of_day(rule['to']),
+         rule['rate'] * 1024 if rule['rate'] else None)
+        for rule in bandwidth
+    ]
+
+
+def _in_period(minute, from_minute, to_minute):
+    if from_minute == to_minute:  # all day
+        return True
+
+    elif from_minute < to_minute:
+        return from_minute <= minute < to_minute
+
+    return minute >= from_minute or minute < to_minute  # cross midnight
+
+
+class BandwidthLimiter:
+    """A bytes per second limiter which can be scheduled by time of day.
+
+    The bucket can store at most 1 second of tokens, the readers take the
+    tokens in advance and wait until the debts are paid back.
+    """
+
+    def __init__(self, bandwidth, loop):
+        """Init.
+
+        Args:
+            bandwidth: a rate (KiB/s), or a list of rules of
+                {'from': 'HH:MM', 'to': 'HH:MM', 'rate': KiB/s or None}.
+            loop: the event loop.
+
+        """
+        self.rules = _parse_rules(bandwidth)
+        self.loop = loop
+
+        self.__tokens = 0
+        self.__last_time = loop.time()
+
+    def get_rate(self):
+        """Get current rate in bytes per second, or None if unlimited."""
+        now = datetime.now()
+        minute = now.hour * 60 + now.minute
+
+        for from_minute, to_minute, rate in self.rules:
+            if _in_period(minute, from_minute, to_minute):
+                return rate
+
+    async def consume(self, nbytes):
+        """Take the tokens of nbytes, wait if the bucket is in debt."""
+        rate = self.get_rate()
+        now = self.loop.time()
+
+        if rate is None:
+            self.__tokens = 0
+            self.__last_time = now
+
+            return
+
+        self.__tokens = min(
+            rate,
+            self.__tokens + (now - self.__last_time) * rate,
+        ) - nbytes
+        self.__last_time = now
+
+        if self.__tokens < 0:
+            wait_sec = -self.__tokens / rate
+
+            stats.add('bandwidth_wait', wait_sec)
+            await asyncio.sleep(wait_sec, loop=self.loop)
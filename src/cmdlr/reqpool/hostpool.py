@@ -1,37 +1,75 @@
 """Maintain host infos."""
 
+import time
 import asyncio
 from datetime import datetime
 from urllib.parse import urlparse
 from collections import deque
 from statistics import mean
 from random import gauss
+from random import random
 from math import inf
 
 
+_WARM_START_TTL = 3600  # seconds the saved error delay can be reused
+_THROTTLED_ERROR_DELAY = 10  # the min error delay of a throttled host
+_HEDGE_MIN_SAMPLES = 5  # elapsed samples required before hedging
+_HEDGE_MAX_BUDGET = 5  # hedges can be saved up for a burst
+_ERROR_RATE_PRIOR_WEIGHT = 10  # requests the saved error rate counts as
+_MAX_ERROR_RATE = 0.9
+
+
 def _clamp(value, _min=-inf, _max=inf):
     return min(max(value, _min), _max)
 
 
 class HostPool:
-    """Maintain host infos."""
+    """Maintain host infos.
 
-    def __init__(self, loop):
+    If a HostState be given, the new hosts warm start from the statistics
+    of previous runs, instead of re-discovering them. A host throttled us
+    (`429 Too Many Requests`) recently starts with a min error delay.
+    """
+
+    def __init__(self, loop, host_state=None):
         """Init host infos."""
         self.loop = loop
+        self.host_state = host_state
 
         self.hosts = {}
 
+        self.__run_images = {}  # netloc: [count, bytes, first, last]
+        self.__run_volumes = {}  # analyzer name: [image netloc, pages...]
+
     def __get_host(self, url):
         netloc = urlparse(url).netloc
 
         return self.hosts[netloc]
 
+    @staticmethod
+    def __get_warm_error_delay(state):
+        """Get the initial error delay from the saved state of a host."""
+        now = time.time()
+        error_delay = 0
+
+        if now - state.get('saved_time', 0) < _WARM_START_TTL:
+            error_delay = state.get('error_delay', 0)
+
+        last_throttled = state.get('last_throttled')
+
+        if last_throttled and now - last_throttled < _WARM_START_TTL:
+            error_delay = max(error_delay, _THROTTLED_ERROR_DELAY)
+
+        return error_delay
+
     def register_host(self, url, per_host_connection, delay):
         """Initialize a host and config it."""
         netloc = urlparse(url).netloc
 
         if netloc not in self.hosts:
+            state = (self.host_state.get_host(netloc)
+                     if self.host_state else {})
+
             self.hosts[netloc] = {
                 'semaphore': asyncio.Semaphore(
                     value=per_host_connection,
@@ -40,10 +78,30 @@ class HostPool:
                 'delay': delay,
 
                 'previous_request_start': datetime.utcnow(),
-                'recent_elapsed_seconds': deque([0.0], maxlen=10),
-                'error_delay': 0,
+                'recent_elapsed_seconds': deque(
+                    [state.get('elapsed', 0.0)], maxlen=10),
+                'recent_image_sizes': deque(
+                    [state['image_size']] if 'image_size' in state else [],
+                    maxlen=50),
+                'error_delay': self.__get_warm_error_delay(state),
+                'last_throttled': state.get('last_throttled'),
+
+                'prior_error_rate': state.get('error_rate', 0.0),
+                'run_requests': 0,
+                'run_errors': 0,
+
+                'hedge_budget': 0.0,
             }
 
+    @staticmethod
+    def __get_error_rate(host):
+        """Get the error rate of this run, smoothed by the saved one."""
+        return (
+            (host['run_errors']
+             + host['prior_error_rate'] * _ERROR_RATE_PRIOR_WEIGHT)
+            / (host['run_requests'] + _ERROR_RATE_PRIOR_WEIGHT)
+        )
+
     def __get_remain_delay_sec(self, url):
         host = self.__get_host(url)
 
@@ -76,6 +134,135 @@ class HostPool:
 
         host['recent_elapsed_seconds'].append(elapsed)
 
+    def add_an_image_size(self, url, size):
+        """Add a new image size for the volume size estimation."""
+        host = self.__get_host(url)
+
+        host['recent_image_sizes'].append(size)
+
+        now = self.loop.time()
+        record = self.__run_images.setdefault(
+            urlparse(url).netloc, [0, 0, now, now])
+        record[0] += 1
+        record[1] += size
+        record[3] = now
+
+    def add_a_volume(self, analyzer_name, image_url, pages):
+        """Add the page count of a downloaded volume."""
+        record = self.__run_volumes.setdefault(analyzer_name, [None])
+        record[0] = urlparse(image_url).netloc
+        record.append(pages)
+
+    def pop_run_records(self):
+        """Get the throughputs of this run, and start a new run.
+
+        Returns:
+            (host_records, analyzer_records). The host_records is a dict of
+            netloc to (averaged, latest), and the analyzer_records is a dict
+            of name to averaged, can be merged into HostState.
+
+        """
+        host_records = {}
+        analyzer_records = {}
+
+        for netloc, host in self.hosts.items():
+            if not host['run_requests']:
+                continue
+
+            averaged = {
+                'elapsed': mean(host['recent_elapsed_seconds']),
+                'error_rate': host['run_errors'] / host['run_requests'],
+            }
+            latest = {
+                'error_delay': host['error_delay'],
+                'last_throttled': host['last_throttled'],
+                'saved_time': time.time(),
+            }
+
+            host['prior_error_rate'] = self.__get_error_rate(host)
+            host['run_requests'] = 0
+            host['run_errors'] = 0
+
+            host_records[netloc] = (averaged, latest)
+
+        for netloc, (count, nbytes, first, last) in self.__run_images.items():
+            averaged, _ = host_records.setdefault(netloc, ({}, {}))
+            averaged['image_size'] = nbytes / count
+
+            if count >= 2 and last > first:
+                averaged['images_per_sec'] = (count - 1) / (last - first)
+
+        for name, (image_host, *pages) in self.__run_volumes.items():
+            analyzer_records[name] = {
+                'pages_per_volume': mean(pages),
+                'image_host': image_host,
+            }
+
+        self.__run_images = {}
+        self.__run_volumes = {}
+
+        return host_records, analyzer_records
+
+    def get_ranked_urls(self, urls):
+        """Sort the urls (of mirrors) from the best host to the worst.
+
+        The healthy hosts (no error delay) go first, then by the expected
+        seconds to succeed, i.e., the recent elapsed seconds plus the error
+        delay, scaled up by the error rate (including the previous runs).
+        The ties are shuffled to spread the requests.
+        """
+        def get_key(url):
+            host = self.__get_host(url)
+            error_delay = host['error_delay']
+            error_rate = min(self.__get_error_rate(host), _MAX_ERROR_RATE)
+
+            return (
+                error_delay > 0,
+                ((mean(host['recent_elapsed_seconds']) + error_delay)
+                 / (1 - error_rate)),
+                random(),
+            )
+
+        return sorted(urls, key=get_key)
+
+    def get_hedge_delay(self, url, percentile):
+        """Get the percentile of recent elapsed seconds, None if unknown."""
+        host = self.__get_host(url)
+        elapsed_seconds = sorted(host['recent_elapsed_seconds'])
+
+        if len(elapsed_seconds) < _HEDGE_MIN_SAMPLES:
+            return None
+
+        index = int(len(elapsed_seconds) * percentile / 100)
+
+        return elapsed_seconds[min(index, len(elapsed_seconds) - 1)]
+
+    def add_hedge_budget(self, url, budget):
+        """Earn the `budget` (a fraction of a hedge) by a request."""
+        host = self.__get_host(url)
+
+        host['hedge_budget'] = min(host['hedge_budget'] + budget,
+                                   _HEDGE_MAX_BUDGET)
+
+    def take_hedge_budget(self, url):
+        """Spend a hedge of the host, return False if not affordable."""
+        host = self.__get_host(url)
+
+        if host['hedge_budget'] < 1:
+            return False
+
+        host['hedge_budget'] -= 1
+
+        return True
+
+    def get_mean_image_size(self, url):
+        """Get mean of recent image sizes, or None if no images fetched."""
+        netloc = urlparse(url).netloc
+        host = self.hosts.get(netloc)
+
+        if host and host['recent_image_sizes']:
+            return mean(host['recent_image_sizes'])
+
     def update_previous_request_start(self, url):
         """Update a new start time."""
         host = self.__get_host(url)
@@ -87,12 +274,21 @@ class HostPool:
         host = self.__get_host(url)
 
         host['error_delay'] = _clamp(host['error_delay'] + 2, _max=600)
+        host['run_requests'] += 1
+        host['run_errors'] += 1
 
     def decrease_error_delay(self, url):
         """Decrease error delay."""
         host = self.__get_host(url)
 
         host['error_delay'] = _clamp(host['error_delay'] - 2, _min=0)
+        host['run_requests'] += 1
+
+    def mark_throttled(self, url):
+        """Record the host responded `429 Too Many Requests`."""
+        host = self.__get_host(url)
+
+        host['last_throttled'] = time.time()
 
     async def wait_for_delay(self, url):
         """Wait for delay (based on host)."""
@@ -101,6 +297,20 @@ class HostPool:
         if delay_sec > 0:
             await asyncio.sleep(delay_sec)
 
+    def collect_metrics(self):
+        """Get metrics samples of all hosts."""
+        samples = []
+
+        for netloc, host in self.hosts.items():
+            labels = {'host': netloc}
+
+            samples.append(('cmdlr_host_recent_elapsed_seconds', labels,
+                            mean(host['recent_elapsed_seconds'])))
+            samples.append(('cmdlr_host_error_delay_seconds', labels,
+                            host['error_delay']))
+
+        return samples
+
     def get_semaphore(self, url):
         """Return a semaphore (based on host)."""
         host = self.__get_host(url)
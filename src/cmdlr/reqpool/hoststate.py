@@ -0,0 +1,84 @@
+"""Keep the performance statistics of hosts and analyzers between runs.
+
+The state file look like:
+
+    {
+        "hosts": {<netloc>: {"images_per_sec": float,
+                             "image_size": float,
+                             "elapsed": float,
+                             "error_rate": float,
+                             "error_delay": float,
+                             "last_throttled": <unix time> or null,
+                             "saved_time": <unix time>}},
+        "analyzers": {<name>: {"pages_per_volume": float,
+                               "image_host": <netloc>}}
+    }
+
+The averaged numbers are exponentially weighted moving averages over runs,
+and the others are the latest values.
+"""
+
+from ..jsona import from_json_filepath
+from ..jsona import to_json_filepath
+
+
+_ALPHA = 0.3
+
+
+def _merge(entry, values):
+    for key, value in values.items():
+        old_value = entry.get(key)
+
+        if isinstance(value, (int, float)) and old_value is not None:
+            entry[key] = old_value + _ALPHA * (value - old_value)
+
+        else:
+            entry[key] = value
+
+
+class HostState:
+    """The statistics kept in a state file."""
+
+    def __init__(self, filepath):
+        """Load the state file, start from empty if not readable."""
+        self.filepath = filepath
+
+        try:
+            data = from_json_filepath(filepath)
+
+        except (OSError, ValueError):
+            data = {}
+
+        self.hosts = data.get('hosts', {})
+        self.analyzers = data.get('analyzers', {})
+
+    def get_host(self, netloc):
+        """Get the statistics of a host."""
+        return self.hosts.get(netloc, {})
+
+    def get_analyzer(self, name):
+        """Get the statistics of an analyzer."""
+        return self.analyzers.get(name, {})
+
+    def update_host(self, netloc, averaged, latest):
+        """Merge the statistics of a host in current run.
+
+        Args:
+            netloc: the host.
+            averaged: a dict of values to be averaged over runs.
+            latest: a dict of values to replace the old ones.
+
+        """
+        host = self.hosts.setdefault(netloc, {})
+
+        _merge(host, averaged)
+        host.update(latest)
+
+    def update_analyzer(self, name, **values):
+        """Merge the statistics of an analyzer in current run."""
+        _merge(self.analyzers.setdefault(name, {}), values)
+
+    def save(self):
+        """Save to the state file."""
+        to_json_filepath({'hosts': self.hosts, 'analyzers': self.analyzers},
+                         self.filepath)
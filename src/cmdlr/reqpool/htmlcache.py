@@ -0,0 +1,164 @@
+"""On-disk cache for the html pages fetched by analyzers.
+
+Each entry is a file named by the hash of the request, which contain a json
+header line and the response body:
+
+    {"url": <final url>, "expires": <unix time>}\\n<body>
+
+The least recently used entries will be evicted when the total size of the
+cache exceed the limit.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+
+
+_MAX_AGE_PATTERN = re.compile(r'(?:^|,)\s*max-age\s*=\s*"?(\d+)"?')
+
+
+def _get_cache_control_ttl(cache_control, ttl):
+    """Get the ttl limited by `Cache-Control` header.
+
+    Returns:
+        0 if the response should not be stored.
+
+    """
+    if not cache_control:
+        return ttl
+
+    cache_control = cache_control.lower()
+
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return 0
+
+    match = _MAX_AGE_PATTERN.search(cache_control)
+
+    if match:
+        return min(ttl, int(match.group(1)))
+
+    return ttl
+
+
+class HtmlCache:
+    """A size-bounded LRU html cache on disk."""
+
+    def __init__(self, dirpath, max_size):
+        """Init.
+
+        Args:
+            dirpath: the cache directory.
+            max_size: max total size in bytes.
+
+        """
+        self.dirpath = dirpath
+        self.max_size = max_size
+
+        self.__total_size = None  # lazy counted
+
+    @staticmethod
+    def __get_key(url, req_kwargs):
+        """Get the cache key, or None if the request is not cacheable."""
+        if req_kwargs.get('method', 'GET').upper() != 'GET':
+            return None
+
+        raw_key = json.dumps([url, req_kwargs], sort_keys=True, default=str)
+
+        return hashlib.sha1(raw_key.encode('utf8')).hexdigest()
+
+    def __get_filepath(self, key):
+        return os.path.join(self.dirpath, key[:2], key)
+
+    def __iter_entries(self):
+        for dirpath, _, filenames in os.walk(self.dirpath):
+            for filename in filenames:
+                filepath = os.path.join(dirpath, filename)
+
+                try:
+                    stat = os.stat(filepath)
+
+                except FileNotFoundError:
+                    continue
+
+                yield filepath, stat
+
+    def __get_total_size(self):
+        if self.__total_size is None:
+            self.__total_size = sum(stat.st_size
+                                    for _, stat in self.__iter_entries())
+
+        return self.__total_size
+
+    def __evict(self):
+        """Remove the least recently used entries until under 90% limit."""
+        entries = sorted(self.__iter_entries(),
+                         key=lambda entry: entry[1].st_mtime)
+        total_size = sum(stat.st_size for _, stat in entries)
+
+        for filepath, stat in entries:
+            if total_size <= self.max_size * 0.9:
+                break
+
+            try:
+                os.remove(filepath)
+
+            except FileNotFoundError:
+                pass
+
+            total_size -= stat.st_size
+
+        self.__total_size = total_size
+
+    def get(self, url, req_kwargs):
+        """Get a cached (binary, final url), or None if not available."""
+        key = self.__get_key(url, req_kwargs)
+
+        if key is None:
+            return None
+
+        filepath = self.__get_filepath(key)
+
+        try:
+            with open(filepath, 'rb') as f:
+                header = json.loads(f.readline().decode('utf8'))
+
+                if header['expires'] < time.time():
+                    return None
+
+                binary = f.read()
+
+            os.utime(filepath)  # mark as recently used
+
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return binary, header['url']
+
+    def put(self, url, req_kwargs, binary, final_url, ttl, cache_control):
+        """Store a response if it is cacheable."""
+        key = self.__get_key(url, req_kwargs)
+        ttl = _get_cache_control_ttl(cache_control, ttl)
+
+        if key is None or ttl <= 0:
+            return
+
+        total_size = self.__get_total_size()
+
+        filepath = self.__get_filepath(key)
+        tmp_filepath = '{}.{}.tmp'.format(filepath, os.getpid())
+        header = json.dumps({'url': final_url, 'expires': time.time() + ttl})
+
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+        with open(tmp_filepath, 'wb') as f:
+            f.write(header.encode('utf8') + b'\n')
+            f.write(binary)
+
+        os.replace(tmp_filepath, filepath)
+
+        self.__total_size = total_size + len(header) + 1 + len(binary)
+
+        if self.__total_size > self.max_size:
+            self.__evict()
@@ -1,68 +1,396 @@
 """Define request cmdlr used."""
 
 import asyncio
+import json
+import time
 from functools import reduce
+from urllib.parse import urlparse
 
 import aiohttp
 from aiohttp_socks.errors import SocksError
 
+from ..exception import TransferStalled
+from ..exception import ResponseBodyInvalid
 from ..log import logger
 from ..merge import merge_dict
+from ..stats import stats
+from ..metrics import metrics
+from .stall import StallDetector
+
+
+_CHUNK_SIZE = 65536
+_HEDGE_RECHECK_INTERVAL = 0.5
+
+
+class _PreloadedResponse:
+    """A response which body was preloaded.
+
+    The `read()`, `text()` and `json()` return the preloaded body, the
+    others are delegated to the aiohttp response.
+    """
+
+    def __init__(self, resp, body):
+        """Init."""
+        self.__resp = resp
+        self.body = body
+
+    def __getattr__(self, name):
+        return getattr(self.__resp, name)
+
+    async def read(self):
+        """Get the preloaded body."""
+        return self.body
+
+    async def text(self, encoding=None, errors='strict'):
+        """Get the preloaded body as text."""
+        return self.body.decode(encoding or self.__resp.get_encoding(),
+                                errors=errors)
+
+    async def json(self, *, loads=json.loads, **unused):
+        """Get the preloaded body as json."""
+        return loads(await self.text())
 
 
 def build_request(
-        analyzer, analyzer_system, session, global_semaphore, host_pool):
+        analyzer, analyzer_system, session, global_semaphore, host_pool,
+        shared_html_cache=None, bandwidth_limiters=()):
     """Get the request class."""
     max_try = analyzer_system['max_try']
     per_host_connections = analyzer_system['per_host_connections']
     delay = analyzer_system['delay']
+    cache_ttl = analyzer_system['html_cache_ttl']
+    hedge = analyzer_system['hedge']
+    stall = analyzer_system['stall']
+    loop = host_pool.loop
 
     class request:
-        """session.request contextmanager."""
+        """session.request contextmanager.
+
+        The body of response is preloaded before entering, and can be got
+        by `resp.body` (or `await resp.read()` as usual).
 
-        def __init__(self, url, **req_kwargs):
+        The `mirrors` are the other urls of the same resource. Each try
+        goes to the best host of them (by `HostPool`), and a retry will
+        fail over to another one instead of the failed host.
+
+        If `hedge` is set, a slow try will be raced by a second request (to
+        a mirror if any), and the first succeeded one wins.
+
+        The `validate_body(resp, body)` can reject a response (e.g., a
+        truncated image) by returning False, then it will be retried as
+        the failed ones.
+
+        Attributes:
+            html_cache: the cache for `autil.fetch`, None if disabled.
+            html_cache_ttl: seconds a cached html page can be reused.
+
+        """
+
+        html_cache = shared_html_cache if cache_ttl else None
+        html_cache_ttl = cache_ttl
+
+        def __init__(self, url, mirrors=(), validate_body=None,
+                     **req_kwargs):
             """init."""
             self.req_kwargs = req_kwargs
+            self.validate_body = validate_body
+            self.urls = [url] + list(mirrors)
             self.url = url
+            self.host = urlparse(url).netloc
 
             self.resp = None
 
-            host_pool.register_host(url, per_host_connections, delay)
+            for mirror_url in self.urls:
+                host_pool.register_host(
+                    mirror_url, per_host_connections, delay)
+
+        def __select_url(self, failed_urls):
+            """Pick the best url which not failed yet in this request."""
+            if len(self.urls) == 1:
+                return
+
+            ranked_urls = host_pool.get_ranked_urls(self.urls)
+            url = next((url for url in ranked_urls
+                        if url not in failed_urls), ranked_urls[0])
+
+            if failed_urls and url not in failed_urls:
+                metrics.inc('cmdlr_request_failovers_total', host=self.host)
+                logger.debug('Request Failover: {} => {}'
+                             .format(self.url, url))
+
+            self.url = url
+            self.host = urlparse(url).netloc
+
+        def __get_hedge_url(self):
+            """Get the best url except current one, for a hedged request."""
+            if len(self.urls) == 1:
+                return self.url
+
+            return next(url for url in host_pool.get_ranked_urls(self.urls)
+                        if url != self.url)
+
+        @staticmethod
+        def __has_free_slot(url):
+            """Check a request can be sent without queuing."""
+            return not (host_pool.get_semaphore(url).locked()
+                        or global_semaphore.locked())
+
+        async def __run_in_semaphore(self, url, async_func):
+            host = urlparse(url).netloc
+            wait_start = time.perf_counter()
+            queuing = True
+            metrics.inc('cmdlr_requests_queued', host=host)
+
+            try:
+                async with host_pool.get_semaphore(url):
+                    async with global_semaphore:
+                        queuing = False
+                        metrics.dec('cmdlr_requests_queued', host=host)
+                        stats.add('semaphore_wait',
+                                  time.perf_counter() - wait_start)
+
+                        with metrics.track('cmdlr_requests_in_flight',
+                                           host=host):
+                            return await async_func()
+
+            finally:
+                if queuing:  # cancelled or failed when waiting
+                    metrics.dec('cmdlr_requests_queued', host=host)
+
+        @staticmethod
+        async def __read_chunked(resp):
+            """Read the body chunk by chunk.
+
+            The reading is under the bandwidth limits, and will be aborted
+            if the transfer stalled.
+            """
+            chunks = []
+            stall_detector = StallDetector(stall, loop) if stall else None
+
+            async for chunk in resp.content.iter_chunked(_CHUNK_SIZE):
+                if stall_detector:
+                    stall_detector.feed(len(chunk))
+
+                for limiter in bandwidth_limiters:
+                    wait_start = loop.time()
+                    await limiter.consume(len(chunk))
 
-        async def __run_in_semaphore(self, async_func):
-            async with host_pool.get_semaphore(self.url):
-                async with global_semaphore:
-                    return await async_func()
+                    if stall_detector:
+                        stall_detector.pause(loop.time() - wait_start)
 
-        async def __get_response(self):
-            await host_pool.wait_for_delay(self.url)
+                chunks.append(chunk)
+
+            return b''.join(chunks)
+
+        async def __get_response(self, url, sent=None, headers_received=None):
+            """Get a _PreloadedResponse.
+
+            Args:
+                sent: a future be done when the request was sent.
+                headers_received: a future be done when got the headers.
+
+            """
+            with stats.timer('host_delay'):
+                await host_pool.wait_for_delay(url)
 
             real_req_kwargs = reduce(
                 merge_dict,
                 [
                     analyzer.default_request_kwargs,
                     self.req_kwargs,
-                    {'url': self.url},
+                    {'url': url},
                 ]
             )
 
-            self.resp = await session.request(**real_req_kwargs)
-            self.resp.raise_for_status()
+            if sent:
+                sent.set_result(None)
+
+            resp = await session.request(**real_req_kwargs)
+
+            try:
+                resp.raise_for_status()
+
+                if headers_received:
+                    headers_received.set_result(None)
+
+                if bandwidth_limiters or stall:
+                    body = await self.__read_chunked(resp)
+
+                else:
+                    body = await resp.read()  # preload for catch exception
+
+            except BaseException:
+                resp.close()
+                raise
+
+            metrics.inc('cmdlr_response_bytes_total', len(body),
+                        host=urlparse(url).netloc)
 
-            await self.resp.read()  # preload for catch exception & retry
+            if self.validate_body and not self.validate_body(resp, body):
+                resp.close()
 
-            return self.resp
+                raise ResponseBodyInvalid(
+                    'Invalid response body ({} bytes)'.format(len(body)))
+
+            return _PreloadedResponse(resp, body)
+
+        async def __get_response_in_semaphore(self, url, *args):
+            return await self.__run_in_semaphore(
+                url, lambda: self.__get_response(url, *args))
+
+        @staticmethod
+        async def __get_first_succeeded(tasks):
+            """Get the first succeeded task.
+
+            Raises:
+                the exception of the last failed task if all failed.
+
+            """
+            pending = set(tasks)
+
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, loop=loop, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    error = task.exception()
+
+                    if error is None:
+                        return task
+
+                if not pending:
+                    raise error
+
+        @staticmethod
+        async def __discard_losers(tasks, winner):
+            """Cancel the pending tasks, and release the succeeded ones."""
+            for task in tasks:
+                if task is winner:
+                    continue
+
+                if not task.done():
+                    task.cancel()
+
+                elif not task.cancelled() and task.exception() is None:
+                    await task.result().release()
+
+        async def __wait_for_hedge(self, primary, sent, headers_received):
+            """Wait until a hedged request should be sent.
+
+            The hedged request be sent when the primary one has no response
+            headers after the `percentile` of recent elapsed seconds of
+            the host, the host hedge budget is enough, and it need not to
+            queue for the connections. Those are checked again and again
+            until the primary one has response headers.
+
+            Returns:
+                the hedge url, or None if the primary one has response.
+
+            """
+            await asyncio.wait([primary, sent], loop=loop,
+                               return_when=asyncio.FIRST_COMPLETED)
+
+            if primary.done():
+                return None
+
+            host_pool.add_hedge_budget(self.url, hedge.get('budget', 0.05))
+            sent_time = loop.time()
+
+            while True:
+                hedge_delay = host_pool.get_hedge_delay(
+                    self.url, hedge.get('percentile', 95))
+
+                if hedge_delay is None:  # not enough samples yet
+                    timeout = _HEDGE_RECHECK_INTERVAL
+
+                elif loop.time() - sent_time < hedge_delay:
+                    timeout = sent_time + hedge_delay - loop.time()
+
+                else:
+                    hedge_url = self.__get_hedge_url()
+
+                    if (self.__has_free_slot(hedge_url)
+                            and host_pool.take_hedge_budget(self.url)):
+                        return hedge_url
+
+                    timeout = _HEDGE_RECHECK_INTERVAL
+
+                await asyncio.wait([primary, headers_received], loop=loop,
+                                   timeout=timeout,
+                                   return_when=asyncio.FIRST_COMPLETED)
+
+                if headers_received.done() or primary.done():
+                    return None
+
+        async def __get_hedged_response(self):
+            """Get (resp, url), race a second request if the first is slow."""
+            sent = loop.create_future()
+            headers_received = loop.create_future()
+            primary = loop.create_task(self.__get_response_in_semaphore(
+                self.url, sent, headers_received))
+            task_to_urls = {primary: self.url}
+            winner = None
+
+            try:
+                hedge_url = await self.__wait_for_hedge(
+                    primary, sent, headers_received)
+
+                if hedge_url:
+                    task_to_urls[loop.create_task(
+                        self.__get_response_in_semaphore(hedge_url),
+                    )] = hedge_url
+
+                    metrics.inc('cmdlr_request_hedges_total', host=self.host)
+                    logger.debug('Request Hedged: {} => {}'
+                                 .format(self.url, hedge_url))
+
+                winner = await self.__get_first_succeeded(task_to_urls)
+                url = task_to_urls[winner]
+
+                if winner is not primary:
+                    metrics.inc('cmdlr_request_hedges_won_total',
+                                host=urlparse(url).netloc)
+
+                return winner.result(), url
+
+            finally:
+                await self.__discard_losers(task_to_urls, winner)
+
+        async def __get_try_response(self):
+            """Get the response of a try, the url may be changed."""
+            if not hedge:
+                return await self.__get_response_in_semaphore(self.url)
+
+            resp, url = await self.__get_hedged_response()
+
+            self.url = url
+            self.host = urlparse(url).netloc
+
+            return resp
 
         async def __aenter__(self):
             """Async with enter."""
+            failed_urls = set()
+
             for try_idx in range(max_try):
+                self.__select_url(failed_urls)
+
                 try:
-                    return await self.__run_in_semaphore(self.__get_response)
+                    self.resp = await self.__get_try_response()
+
+                    return self.resp
 
                 except (asyncio.TimeoutError,
                         aiohttp.ClientError,
-                        SocksError) as e:
+                        SocksError,
+                        TransferStalled,
+                        ResponseBodyInvalid) as e:
                     current_try = try_idx + 1
+                    failed_urls.add(self.url)
+
+                    if current_try < max_try:
+                        metrics.inc('cmdlr_request_retries_total',
+                                    host=self.host)
 
                     logger.error(
                         'Request Failed ({}/{}): {} => {}: {}'
@@ -3,8 +3,13 @@
 import asyncio
 
 from .hostpool import HostPool
+from .hoststate import HostState
 from .sesspool import SessionPool
 from .req import build_request
+from .htmlcache import HtmlCache
+from .bwlimit import BandwidthLimiter
+from ..metrics import metrics
+from ..comic.diskspace import DiskSpaceGate
 
 
 class RequestPool:
@@ -15,7 +20,8 @@ class RequestPool:
         self.config = config
         self.loop = loop
 
-        self.host_pool = HostPool(loop)
+        self.host_state = HostState(config.host_state_filepath)
+        self.host_pool = HostPool(loop, self.host_state)
         self.session_pool = SessionPool()
 
         self.semaphore = asyncio.Semaphore(
@@ -25,6 +31,41 @@ class RequestPool:
 
         self.requests = {}
 
+        self.disk_space_gate = DiskSpaceGate(
+            config.disk_min_free,
+            config.disk_max_wait,
+            loop,
+        )
+
+        if config.bandwidth:
+            self.bandwidth_limiter = BandwidthLimiter(config.bandwidth, loop)
+
+        else:
+            self.bandwidth_limiter = None
+
+        if config.html_cache_dir:
+            self.html_cache = HtmlCache(
+                config.html_cache_dir,
+                config.html_cache_max_size,
+            )
+
+        else:
+            self.html_cache = None
+
+        metrics.set_collector('host_pool', self.host_pool.collect_metrics)
+
+    def __get_bandwidth_limiters(self, analyzer_system):
+        limiters = []
+
+        if self.bandwidth_limiter:
+            limiters.append(self.bandwidth_limiter)
+
+        if analyzer_system['bandwidth']:
+            limiters.append(BandwidthLimiter(analyzer_system['bandwidth'],
+                                             self.loop))
+
+        return limiters
+
     def get_request(self, analyzer):
         """Get cmdlr request."""
         request = self.requests.get(analyzer)
@@ -43,11 +84,26 @@ class RequestPool:
                 ),
                 self.semaphore,
                 self.host_pool,
+                self.html_cache,
+                self.__get_bandwidth_limiters(analyzer_system),
             )
             self.requests[analyzer] = request
 
         return request
 
+    def save_host_state(self):
+        """Merge the statistics of this run into the host state file."""
+        host_records, analyzer_records = self.host_pool.pop_run_records()
+
+        for netloc, (averaged, latest) in host_records.items():
+            self.host_state.update_host(netloc, averaged, latest)
+
+        for name, values in analyzer_records.items():
+            self.host_state.update_analyzer(name, **values)
+
+        if host_records or analyzer_records:
+            self.host_state.save()
+
     async def close(self):
         """Close all resource."""
         await self.session_pool.close()
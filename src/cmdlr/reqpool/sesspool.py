@@ -1,6 +1,7 @@
 """Maintain aiohttp sessions."""
 
-from datetime import datetime
+import asyncio
+from urllib.parse import urlparse
 
 from aiohttp import ClientSession
 from aiohttp import ClientTimeout
@@ -8,6 +9,8 @@ from aiohttp import TraceConfig
 
 from aiohttp_socks import SocksConnector
 
+from ..metrics import metrics
+
 
 def _start_timer(host_pool, url, start):
         host_pool.update_previous_request_start(url)
@@ -25,6 +28,9 @@ def _stop_timer(host_pool, response, timer, end):
     if response.status != 200:
         host_pool.increase_error_delay(url)
 
+        if response.status == 429:
+            host_pool.mark_throttled(url)
+
     else:
         elapsed = end - start
         host_pool.add_an_elapsed(url, elapsed)
@@ -49,11 +55,22 @@ def _get_timing_trace_config(host_pool):
             end=now,
         )
 
+        metrics.inc('cmdlr_requests_total',
+                    host=urlparse(trace_config_ctx.timer['url']).netloc,
+                    status=str(params.response.status))
+
     async def on_request_exception(session, trace_config_ctx, params):
+        if isinstance(params.exception, asyncio.CancelledError):
+            return  # e.g., the loser of a hedged request
+
         url = trace_config_ctx.timer['url']
 
         host_pool.increase_error_delay(url)
 
+        metrics.inc('cmdlr_requests_total',
+                    host=urlparse(url).netloc,
+                    status='error')
+
     trace_config = TraceConfig()
 
     trace_config.on_request_start.append(on_request_start)
@@ -75,7 +92,11 @@ class SessionPool:
         timing_trace_config = _get_timing_trace_config(host_pool)
 
         session_init_kwargs = {
-            'timeout': ClientTimeout(total=analyzer_system['timeout']),
+            'timeout': ClientTimeout(
+                total=analyzer_system['timeout'],
+                sock_connect=analyzer_system['connect_timeout'],
+                sock_read=analyzer_system['read_timeout'],
+            ),
             'trace_configs': [timing_trace_config],
         }
 
@@ -0,0 +1,58 @@
+"""Detect the stalled response body transfers."""
+
+from ..exception import TransferStalled
+
+
+class StallDetector:
+    """Check the transfer rate of a response body window by window.
+
+    A connection may send the headers then trickle the bytes, which will
+    not trigger the socket read timeout but hold the request for a long
+    time. The waiting for the bandwidth limiters should be excluded by
+    `pause()`.
+    """
+
+    def __init__(self, stall, loop):
+        """Init.
+
+        Args:
+            stall: {'min_rate': KiB/s, 'window': seconds}.
+            loop: the event loop.
+
+        """
+        self.min_rate = stall.get('min_rate', 1) * 1024
+        self.window = stall.get('window', 30)
+        self.loop = loop
+
+        self.__window_start = loop.time()
+        self.__window_bytes = 0
+        self.__paused = 0
+
+    def pause(self, seconds):
+        """Exclude the seconds not waiting for the network."""
+        self.__paused += seconds
+
+    def feed(self, nbytes):
+        """Count the received bytes.
+
+        Raises:
+            TransferStalled: the rate of last window lower than `min_rate`.
+
+        """
+        now = self.loop.time()
+        elapsed = now - self.__window_start - self.__paused
+        self.__window_bytes += nbytes
+
+        if elapsed < self.window:
+            return
+
+        rate = self.__window_bytes / elapsed
+
+        if rate < self.min_rate:
+            raise TransferStalled(
+                'Transfer stalled: {:.2f} KiB/s in last {:.0f} seconds'
+                .format(rate / 1024, elapsed))
+
+        self.__window_start = now
+        self.__window_bytes = 0
+        self.__paused = 0
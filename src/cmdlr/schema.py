@@ -12,6 +12,7 @@ from voluptuous import Unique
 from voluptuous import All
 from voluptuous import Any
 from voluptuous import Invalid
+from voluptuous import Match
 from voluptuous import ALLOW_EXTRA
 
 
@@ -65,8 +66,58 @@ meta_schema = parsed_meta_schema.extend({
     Required('url'): FqdnUrl(),
     Required('volumes_checked_time'): DT.datetime,
     Required('volumes_modified_time'): DT.datetime,
+    'tags': All([str], Unique()),
 })
 
+_image_transcode_schema = Any(
+    None,
+    {
+        'format': Any(None, 'jpeg', 'webp', 'png'),
+        'quality': All(int, Range(min=1, max=100)),
+        'max_height': Any(
+            None,
+            All(int, Range(min=1)),
+        ),
+    },
+)
+
+_bandwidth_rate_schema = Any(
+    None,
+    All(Any(int, float), Range(min=1)),
+)
+
+_bandwidth_schema = Any(
+    _bandwidth_rate_schema,
+    [
+        {
+            Required('from'): Match(r'^([01]\d|2[0-3]):[0-5]\d$'),
+            Required('to'): Match(r'^([01]\d|2[0-3]):[0-5]\d$'),
+            Required('rate'): _bandwidth_rate_schema,
+        },
+    ],
+)
+
+_hedge_schema = Any(
+    None,
+    {
+        'percentile': All(Any(int, float), Range(min=1, max=100)),
+        'budget': All(Any(int, float), Range(min=0, max=1)),
+    },
+)
+
+_sub_timeout_schema = Any(
+    None,
+    All(Any(int, float), Range(min=1)),
+)
+
+_stall_schema = Any(
+    None,
+    {
+        'min_rate': All(Any(int, float), Range(min=0)),
+        'window': All(Any(int, float), Range(min=1)),
+    },
+)
+
 config_schema = Schema({
     'data_dirs': All(
         [
@@ -87,6 +138,41 @@ config_schema = Schema({
         All(_safepath_str, Length(min=1)),
     ),
 
+    'image_store_dir': Any(
+        None,
+        All(_safepath_str, Length(min=1)),
+    ),
+
+    'image_store_max_size': All(
+        Any(int, float),
+        Range(min=0),
+    ),
+
+    'temp_dir': Any(
+        None,
+        All(_safepath_str, Length(min=1)),
+    ),
+
+    'disk_space': {
+        'min_free': All(
+            Any(int, float),
+            Range(min=0),
+        ),
+        'max_wait': All(
+            Any(int, float),
+            Range(min=0),
+        ),
+    },
+
+    'image_transcode': _image_transcode_schema,
+
+    'archive_fsync': Any('none', 'file', 'dir'),
+
+    'host_state_file': Any(
+        None,
+        All(_safepath_str, Length(min=1)),
+    ),
+
     'network': {
         'delay': All(
             Any(int, float),
@@ -96,6 +182,9 @@ config_schema = Schema({
             Any(int, float),
             Range(min=1),
         ),
+        'connect_timeout': _sub_timeout_schema,
+        'read_timeout': _sub_timeout_schema,
+        'stall': _stall_schema,
         'max_try': All(int, Range(min=1)),
         'total_connections': All(int, Range(min=1)),
         'per_host_connections': All(int, Range(min=1)),
@@ -103,10 +192,74 @@ config_schema = Schema({
             None,
             All(_safepath_str, Length(min=1)),
         ),
+        'bandwidth': _bandwidth_schema,
+        'hedge': _hedge_schema,
     },
 
     'book_concurrent': All(int, Range(min=1)),
 
+    'priority': {
+        'order': All(
+            [Any('new', 'tags', 'ongoing', 'missing')],
+            Unique(),
+        ),
+        'tag_weights': {
+            str: Any(int, float),
+        },
+    },
+
+    'html_cache': {
+        'dir': Any(
+            None,
+            All(_safepath_str, Length(min=1)),
+        ),
+        'ttl': All(
+            Any(int, float),
+            Range(min=0),
+        ),
+        'max_size': All(
+            Any(int, float),
+            Range(min=0),
+        ),
+    },
+
+    'stats': {
+        'log_interval': All(
+            Any(int, float),
+            Range(min=0),
+        ),
+        'filepath': Any(
+            None,
+            All(_safepath_str, Length(min=1)),
+        ),
+    },
+
+    'metrics': {
+        'textfile': Any(
+            None,
+            All(_safepath_str, Length(min=1)),
+        ),
+        'listen': Any(
+            None,
+            Match(r'^[^:]*:\d+$'),
+        ),
+    },
+
+    'daemon': {
+        'interval': All(
+            Any(int, float),
+            Range(min=0),
+        ),
+        'update_meta': bool,
+        'download': bool,
+        'skip_errors': bool,
+        'refresh': bool,
+        'control_socket': Any(
+            None,
+            All(_safepath_str, Length(min=1)),
+        ),
+    },
+
     'analyzer_pref': {
         str: Schema({
             'system': Schema({
@@ -119,8 +272,18 @@ config_schema = Schema({
                     Any(int, float),
                     Range(min=1),
                 ),
+                'connect_timeout': _sub_timeout_schema,
+                'read_timeout': _sub_timeout_schema,
+                'stall': _stall_schema,
                 'max_try': All(int, Range(min=1)),
                 'per_host_connection': All(int, Range(min=1)),
+                'html_cache_ttl': All(
+                    Any(int, float),
+                    Range(min=0),
+                ),
+                'image_transcode': _image_transcode_schema,
+                'bandwidth': _bandwidth_schema,
+                'hedge': _hedge_schema,
             }, extra=0),
         }, extra=ALLOW_EXTRA),
     },
@@ -0,0 +1,165 @@
+"""Collect the performance statistics of a run.
+
+Usage:
+
+    from .stats import stats
+
+    with stats.timer('fetch'):
+        ...  # the time of this block will be recorded into 'fetch' stage
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from .jsona import to_json_filepath
+from .log import logger
+
+
+_LOOP_LAG_SAMPLE_INTERVAL = 0.1
+
+
+class _Record:
+    """Aggregated durations of a kind of operation."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': round(self.total, 6),
+            'mean': round(self.mean, 6),
+            'max': round(self.max, 6),
+        }
+
+
+class Stats:
+    """Statistics holder.
+
+    All time values are in seconds. It is thread-safe, because some
+    operations (e.g., `run_in_nodejs`) are running in the executor.
+    """
+
+    def __init__(self):
+        """Init."""
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear all collected data."""
+        with self.__lock:
+            self.started_time = datetime.utcnow()
+            self.__started = time.perf_counter()
+            self.__stages = {}
+            self.__loop_lag = _Record()
+
+    def add(self, stage, seconds):
+        """Add a duration into a stage."""
+        with self.__lock:
+            if stage not in self.__stages:
+                self.__stages[stage] = _Record()
+
+            self.__stages[stage].add(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Record the time of the block into a stage."""
+        start = time.perf_counter()
+
+        try:
+            yield
+
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add_loop_lag(self, seconds):
+        """Add a sample of event loop lag."""
+        with self.__lock:
+            self.__loop_lag.add(seconds)
+
+    def get_data(self):
+        """Get all statistics as a json serializable dict."""
+        with self.__lock:
+            return {
+                'started_time': self.started_time,
+                'elapsed': round(time.perf_counter() - self.__started, 6),
+                'stages': {stage: record.to_dict()
+                           for stage, record in self.__stages.items()},
+                'loop_lag': self.__loop_lag.to_dict(),
+            }
+
+    def get_summary(self):
+        """Get a single line summary for logging."""
+        with self.__lock:
+            stage_texts = [
+                '{} {}x avg {:.3f}s max {:.3f}s'.format(
+                    stage, record.count, record.mean, record.max)
+                for stage, record in sorted(self.__stages.items())
+            ]
+            stage_texts.append(
+                'loop lag avg {:.1f}ms max {:.1f}ms'.format(
+                    self.__loop_lag.mean * 1000,
+                    self.__loop_lag.max * 1000))
+
+            return 'Stats ({:.0f}s): {}'.format(
+                time.perf_counter() - self.__started,
+                ' | '.join(stage_texts))
+
+    def collect_metrics(self):
+        """Get metrics samples of all stages."""
+        data = self.get_data()
+        samples = [('cmdlr_event_loop_lag_seconds_max', {},
+                    data['loop_lag']['max'])]
+
+        for stage, record in data['stages'].items():
+            labels = {'stage': stage}
+
+            samples.append(('cmdlr_stage_seconds_total', labels,
+                            record['total']))
+            samples.append(('cmdlr_stage_calls_total', labels,
+                            record['count']))
+
+        return samples
+
+    def save(self, filepath):
+        """Save statistics as a json file."""
+        to_json_filepath(self.get_data(), filepath)
+
+
+async def run_monitor(loop, log_interval):
+    """Sample the event loop lag and log the summary periodically.
+
+    Args:
+        loop: the event loop be monitored.
+        log_interval: seconds between two summary log lines, 0 mean never.
+
+    """
+    last_log_time = loop.time()
+
+    while True:
+        start = loop.time()
+        await asyncio.sleep(_LOOP_LAG_SAMPLE_INTERVAL)
+        end = loop.time()
+
+        stats.add_loop_lag(max(end - start - _LOOP_LAG_SAMPLE_INTERVAL, 0))
+
+        if log_interval and end - last_log_time >= log_interval:
+            logger.info(stats.get_summary())
+            last_log_time = end
+
+
+stats = Stats()